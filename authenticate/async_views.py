@@ -0,0 +1,79 @@
+from functools import wraps
+
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from order_proj.db_router import achoose_replica, use_replica
+
+from .authentication import SnapshotJWTAuthentication
+from .models import CustomUser
+from .serializers import ProfileSerializer
+
+SAFE_METHODS = ("GET", "HEAD")
+
+renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+authenticator = SnapshotJWTAuthentication()
+
+
+def render(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        renderer.render(data),
+        content_type=renderer.media_type,
+        status=status,
+        headers=headers,
+    )
+
+
+def render_exception(request, exc):
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers = {"WWW-Authenticate": authenticator.authenticate_header(request)}
+    return render(data, exc.status_code, headers)
+
+
+def async_api_view(permission_classes=(IsAuthenticated,)):
+    # Read-only counterpart of @api_view for coroutine views. The request is
+    # authenticated from the user snapshot and wrapped in a DRF Request for
+    # query_params, without the thread hop a sync view costs under ASGI.
+    # Queries go to a read replica when one is configured.
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            drf_request = Request(request, authenticators=())
+            try:
+                if request.method not in SAFE_METHODS:
+                    raise exceptions.MethodNotAllowed(request.method)
+
+                result = await authenticator.aauthenticate(request)
+                if result is not None:
+                    drf_request.user, drf_request.auth = result
+                for permission in permission_classes:
+                    if not permission().has_permission(drf_request, None):
+                        if result is None:
+                            raise exceptions.NotAuthenticated()
+                        raise exceptions.PermissionDenied()
+
+                with use_replica(await achoose_replica(drf_request.user)):
+                    return await view(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return render_exception(request, exc)
+
+        return wrapper
+
+    return decorator
+
+
+@async_api_view()
+async def get_profile(request):
+    user = await CustomUser.objects.prefetch_related("groups", "user_permissions").aget(
+        pk=request.user.pk
+    )
+    return render(ProfileSerializer(user).data)
@@ -0,0 +1,167 @@
+import threading
+import time
+from functools import partial
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import CustomUser
+
+
+USER_SNAPSHOT_TTL = settings.USER_SNAPSHOT_TTL
+USER_SNAPSHOT_MAX_ENTRIES = settings.USER_SNAPSHOT_MAX_ENTRIES
+USER_SNAPSHOT_CACHE = settings.USER_SNAPSHOT_CACHE
+
+SNAPSHOT_FIELDS = ("pk", "username", "is_staff", "is_superuser", "is_active")
+
+
+class UserSnapshot:
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, pk, username, is_staff, is_superuser, is_active, password_hash):
+        self.pk = self.id = pk
+        self.username = username
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+        self.is_active = is_active
+        self.password_hash = password_hash
+
+    def __str__(self):
+        return self.username
+
+    def get_username(self):
+        return self.username
+
+
+_lock = threading.Lock()
+_snapshots = {}
+
+
+def _cache():
+    return caches[USER_SNAPSHOT_CACHE]
+
+
+def _key(user_id):
+    return f"user-snapshot-version:{user_id}"
+
+
+def _rows(user_id):
+    fields = SNAPSHOT_FIELDS + ("password",)
+    return CustomUser.objects.filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ).values_list(*fields)
+
+
+def _snapshot(row):
+    if row is None:
+        return None
+    *values, password = row
+    password_hash = (
+        get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else None
+    )
+    return UserSnapshot(*values, password_hash)
+
+
+def _cached(user_id, version, now):
+    entry = _snapshots.get(user_id)
+    if entry is not None and entry[0] > now and entry[1] == version:
+        return entry[2]
+    return None
+
+
+def _store(user_id, version, snapshot, now):
+    if snapshot is not None:
+        with _lock:
+            if len(_snapshots) >= USER_SNAPSHOT_MAX_ENTRIES:
+                for key, (expires_at, *_) in list(_snapshots.items()):
+                    if expires_at <= now:
+                        del _snapshots[key]
+                if len(_snapshots) >= USER_SNAPSHOT_MAX_ENTRIES:
+                    _snapshots.clear()
+            _snapshots[user_id] = (now + USER_SNAPSHOT_TTL, version, snapshot)
+    return snapshot
+
+
+def get_snapshot(user_id):
+    now = time.monotonic()
+    version = _cache().get(_key(user_id))
+    snapshot = _cached(user_id, version, now)
+    if snapshot is None:
+        row = _rows(user_id).first()
+        snapshot = _store(user_id, version, _snapshot(row), now)
+    return snapshot
+
+
+async def aget_snapshot(user_id):
+    now = time.monotonic()
+    version = await _cache().aget(_key(user_id))
+    snapshot = _cached(user_id, version, now)
+    if snapshot is None:
+        row = await _rows(user_id).afirst()
+        snapshot = _store(user_id, version, _snapshot(row), now)
+    return snapshot
+
+
+def _invalidate(user_id):
+    _snapshots.pop(user_id, None)
+    _cache().set(_key(user_id), uuid4().hex, USER_SNAPSHOT_TTL)
+
+
+def forget_snapshot(user_id):
+    # Snapshots remember the shared version they were loaded under, so a new
+    # version makes every worker reload the user. The version is read before
+    # the row, so a save racing a load leaves that snapshot already stale.
+    _snapshots.pop(user_id, None)
+    transaction.on_commit(partial(_invalidate, user_id))
+
+
+class SnapshotJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        return self.check_user(
+            validated_token, get_snapshot(self.user_id(validated_token))
+        )
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user = await aget_snapshot(self.user_id(validated_token))
+        return self.check_user(validated_token, user), validated_token
+
+    def user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, validated_token, user):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if (
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+                != user.password_hash
+            ):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import BlacklistedToken
+
+
+TOKEN_BLACKLIST_CACHE = settings.TOKEN_BLACKLIST_CACHE
+
+
+def _cache():
+    return caches[TOKEN_BLACKLIST_CACHE]
+
+
+def _key(jti):
+    return f"token-blacklist:{jti}"
+
+
+def _remember(jti, expires_at):
+    timeout = (expires_at - timezone.now()).total_seconds()
+    if timeout > 0:
+        _cache().set(_key(jti), True, timeout)
+
+
+def expiry(token):
+    return datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+
+
+def add(jti, expires_at):
+    if _cache().get(_key(jti)):
+        return False
+    try:
+        with transaction.atomic():
+            BlacklistedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        _remember(jti, expires_at)
+        return False
+    _remember(jti, expires_at)
+    return True
+
+
+def contains(jti):
+    if _cache().get(_key(jti)):
+        return True
+    expires_at = (
+        BlacklistedToken.objects.filter(pk=jti)
+        .values_list("expires_at", flat=True)
+        .first()
+    )
+    if expires_at is None:
+        return False
+    _remember(jti, expires_at)
+    return True
+
+
+def purge_expired(batch_size=1000, now=None):
+    now = now or timezone.now()
+    expired = BlacklistedToken.objects.filter(expires_at__lte=now)
+    deleted = 0
+    while True:
+        batch = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += BlacklistedToken.objects.filter(pk__in=batch).delete()[0]
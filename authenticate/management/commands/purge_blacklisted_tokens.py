@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from authenticate.blacklist import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete blacklisted refresh tokens that have expired, in batches. "
+        "Expired tokens are rejected by their signature check anyway, so the "
+        "rows only take up space."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {deleted} expired blacklisted tokens.")
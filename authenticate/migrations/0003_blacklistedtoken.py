@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "authenticate",
+            "0002_remove_customuser_bio_customuser_date_of_birth_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BlacklistedToken",
+            fields=[
+                (
+                    "jti",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,12 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.drainage import set_override
+
+from .authentication import SnapshotJWTAuthentication
+
+
+class SnapshotJWTScheme(SimpleJWTScheme):
+    target_class = SnapshotJWTAuthentication
+
+
+# Both classes accept the same bearer token, so they share the jwtAuth scheme.
+set_override(SnapshotJWTAuthentication, "suppress_collision_warning", True)
@@ -3,10 +3,18 @@ from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from . import blacklist
 from .models import CustomUser
 
+TOKEN_BLACKLISTED = "Token is blacklisted"
+
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -16,6 +24,30 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class BlacklistingTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # Claim the jti before issuing anything, so two concurrent refreshes
+            # of the same token cannot both succeed.
+            if not blacklist.add(jti, blacklist.expiry(refresh)):
+                raise TokenError(TOKEN_BLACKLISTED)
+        elif blacklist.contains(jti):
+            raise TokenError(TOKEN_BLACKLISTED)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        return data
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True, required=True, validators=[validate_password]
@@ -1,3 +1,163 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from booking.models import Office, Room, Seat
+
+from . import authentication
+from .authentication import get_snapshot
+from .blacklist import add, contains, purge_expired
+from .models import BlacklistedToken, CustomUser
+
+
+class SnapshotAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        self.room = Room.objects.create(office=office, name="Test Room")
+        Seat.objects.create(room=self.room, number=1)
+        cache.clear()
+
+    def test_warm_read_endpoint_makes_no_auth_queries(self):
+        url = reverse("available-seats")
+        params = {
+            "date": (timezone.localdate() + timedelta(days=2)).isoformat(),
+            "room_id": self.room.pk,
+        }
+        self.client.get(url, params, **self.auth)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, params, **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_snapshot_is_invalidated_when_user_is_saved(self):
+        url = reverse("available-seats-cache-stats")
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_save_in_another_worker_invalidates_snapshot(self):
+        self.assertFalse(get_snapshot(self.user.pk).is_staff)
+
+        # Restoring the dict keeps this worker's stale entry, as if another
+        # worker had saved the user.
+        with mock.patch.dict(authentication._snapshots):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.is_staff = True
+                self.user.save()
+
+        self.assertTrue(get_snapshot(self.user.pk).is_staff)
+
+    def test_writes_do_not_use_snapshot(self):
+        self.user.is_staff = True
+        self.user.save()
+        url = reverse("office-list")
+        self.client.get(url, **self.auth)
+
+        # Demoted elsewhere, so this worker's snapshot is not invalidated.
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=False)
+
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            url, {"name": "Other", "location": "Elsewhere"}, **self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_snapshot_for_deleted_user(self):
+        user_id = self.user.pk
+        self.assertEqual(get_snapshot(user_id).username, "testuser")
+
+        self.user.delete()
+
+        self.assertIsNone(get_snapshot(user_id))
+
+
+class TokenRefreshBlacklistTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.url = reverse("token_refresh")
+        cache.clear()
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh = str(RefreshToken.for_user(self.user))
+
+        response = self.client.post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["refresh"], refresh)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        cache.clear()
+        response = self.client.post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_failed_insert_is_not_cached(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        with mock.patch.object(
+            BlacklistedToken.objects, "create", side_effect=OperationalError
+        ):
+            with self.assertRaises(OperationalError):
+                add("jti", expires_at)
+
+        self.assertFalse(contains("jti"))
+
+    def test_purge_expired(self):
+        now = timezone.now()
+        BlacklistedToken.objects.bulk_create(
+            BlacklistedToken(jti=str(index), expires_at=now + timedelta(hours=offset))
+            for index, offset in enumerate([-2, -1, -1, 1])
+        )
+
+        self.assertEqual(purge_expired(batch_size=2, now=now), 3)
+        self.assertQuerysetEqual(
+            BlacklistedToken.objects.values_list("jti", flat=True), ["3"]
+        )
+
+
+class AsyncProfileTests(TestCase):
+    async def test_matches_sync_view(self):
+        user = await CustomUser.objects.acreate(
+            username="testuser", email="test@example.com"
+        )
+        token = AccessToken.for_user(user)
+
+        expected = await self.async_client.get(
+            reverse("profile"), headers={"Authorization": f"Bearer {token}"}
+        )
+        response = await self.async_client.get(
+            reverse("profile-async"), headers={"Authorization": f"Bearer {token}"}
+        )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected.json())
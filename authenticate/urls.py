@@ -1,7 +1,7 @@
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("api/token/", views.MyTokenObtainPairView.as_view(), name="token_obtain_pair"),
@@ -9,6 +9,7 @@ urlpatterns = [
     path("api/register/", views.RegisterView.as_view(), name="auth_register"),
     # Profile
     path("api/profile/", views.get_profile, name="profile"),
+    path("api/async/profile/", async_views.get_profile, name="profile-async"),
     path("api/change-password/", views.change_password, name="change-password"),
     path("api/profile/update/", views.update_profile, name="update-profile"),
 ]
@@ -1,24 +1,35 @@
 from django.contrib import admin
-from .models import Booking, Office, Room, Seat
+from .models import Booking, BookingSeries, Office, Room, Seat
+
+
+class SoftDeleteAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        return self.model.objects.all_with_deleted()
 
 
 @admin.register(Office)
-class OfficeAdmin(admin.ModelAdmin):
-    list_display = ["name", "location", "is_active"]
+class OfficeAdmin(SoftDeleteAdmin):
+    list_display = ["name", "location", "time_zone", "is_active"]
 
 
 @admin.register(Room)
-class RoomAdmin(admin.ModelAdmin):
+class RoomAdmin(SoftDeleteAdmin):
     list_display = ["office", "name", "is_active"]
 
 
 @admin.register(Seat)
-class SeatAdmin(admin.ModelAdmin):
+class SeatAdmin(SoftDeleteAdmin):
     list_display = ["room", "number", "is_active"]
 
 
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(SoftDeleteAdmin):
+    list_display = ["user", "seat", "frequency", "start_time", "until", "is_active"]
+    list_filter = ["frequency", "is_active"]
+
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(SoftDeleteAdmin):
     list_display = ["user", "seat", "start_time", "end_time", "is_active"]
     list_filter = ["is_active"]
     search_fields = ["user__username", "seat__number"]
@@ -0,0 +1,106 @@
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+
+from authenticate.async_views import async_api_view, render
+
+from . import availability_cache, office_config
+from .models import Booking, Office, Room, Seat
+from .pagination import BookingPagination, KeysetPagination
+from .serializers import (
+    AvailableSeatsSerializer,
+    BookingSerializer,
+    MyBookingsSerializer,
+    OfficeSerializer,
+    RoomSerializer,
+    SeatSerializer,
+    parse_expand,
+    row_mapper,
+)
+
+
+async def _paginate(request, paginator, queryset, serializer_class):
+    expand = parse_expand(request.query_params.get("expand"))
+    if not expand:
+        rows = row_mapper(serializer_class)
+        page = await paginator.apaginate_queryset(rows.values(queryset), request)
+        return render(paginator.get_paginated_data(rows(page)))
+
+    queryset = serializer_class.select_expanded(queryset, expand)
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, expand=expand)
+    return render(paginator.get_paginated_data(serializer.data))
+
+
+@async_api_view()
+async def available_seats(request):
+    # Validation needs the office time zone; look it up without blocking.
+    try:
+        config = await office_config.afor_room(int(request.query_params["room_id"]))
+    except (KeyError, ValueError):
+        config = office_config.DEFAULT_CONFIG
+
+    serializer = AvailableSeatsSerializer(
+        data=request.query_params, context={"zone": config.zone}
+    )
+    if not serializer.is_valid():
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    date = serializer.validated_data["date"]
+    room_id = serializer.validated_data["room_id"]
+    response_data = {
+        "date": date,
+        "time_by_seat": await availability_cache.aget_available_seats(date, room_id),
+    }
+    return render(response_data)
+
+
+@async_api_view()
+async def list_my_bookings(request):
+    serializer = MyBookingsSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    if params["summary"]:
+        bookings = Booking.objects.for_user(
+            request.user, start=params.get("from"), end=params.get("to")
+        )
+        return render(await Booking.objects.astatus_summary(bookings))
+
+    bookings = Booking.objects.for_user(
+        request.user,
+        start=params.get("from"),
+        end=params.get("to"),
+        status=params.get("status"),
+    )
+    paginator = BookingPagination()
+    if params.get("status") == MyBookingsSerializer.PAST:
+        paginator.ordering = ("-start_time", "-id")
+    return await _paginate(request, paginator, bookings, BookingSerializer)
+
+
+def model_views(queryset, serializer_class):
+    @async_api_view()
+    async def list_view(request):
+        return await _paginate(
+            request, KeysetPagination(), queryset.all(), serializer_class
+        )
+
+    @async_api_view()
+    async def detail_view(request, pk):
+        expand = parse_expand(request.query_params.get("expand"))
+        instance = await serializer_class.select_expanded(
+            queryset.filter(pk=pk), expand
+        ).afirst()
+        if instance is None:
+            raise NotFound(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+        return render(serializer_class(instance, expand=expand).data)
+
+    return list_view, detail_view
+
+
+office_list, office_detail = model_views(Office.objects.all(), OfficeSerializer)
+room_list, room_detail = model_views(Room.objects.all(), RoomSerializer)
+seat_list, seat_detail = model_views(Seat.objects.all(), SeatSerializer)
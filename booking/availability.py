@@ -0,0 +1,115 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+
+def day_bounds(start_date, end_date, zone=None):
+    day_start = timezone.make_aware(
+        datetime.combine(start_date, datetime.min.time()), zone
+    )
+    day_end = timezone.make_aware(
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time()), zone
+    )
+    return day_start, day_end
+
+
+def dates_between(start_date, end_date):
+    date = start_date
+    while date <= end_date:
+        yield date
+        date += timedelta(days=1)
+
+
+def group_by_seat(rows):
+    intervals_by_seat = defaultdict(list)
+    for seat_id, start_time, end_time in rows:
+        intervals_by_seat[seat_id].append((start_time, end_time))
+    return intervals_by_seat
+
+
+def merge_intervals(intervals):
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def overlaps(merged, start, end):
+    starts, ends = merged
+    index = bisect_right(ends, start)
+    return index < len(starts) and starts[index] < end
+
+
+def free_gaps(merged, start, end):
+    cursor = start
+    if merged:
+        starts, ends = merged
+        index = bisect_right(ends, start)
+        while index < len(starts) and starts[index] < end:
+            if starts[index] > cursor:
+                yield cursor, starts[index]
+            cursor = max(cursor, ends[index])
+            index += 1
+    if cursor < end:
+        yield cursor, end
+
+
+def iter_bits(mask):
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+class SlotGrid:
+    def __init__(self, slots, labels, starts, ends):
+        self.slots = slots
+        self.labels = labels
+        self.starts = starts
+        self.ends = ends
+        self.full = (1 << len(slots)) - 1
+
+    def since(self, start):
+        index = bisect_left(self.starts, start)
+        if not index:
+            return self
+        return SlotGrid(
+            self.slots[index:],
+            labels=self.labels[index:],
+            starts=self.starts[index:],
+            ends=self.ends[index:],
+        )
+
+    def occupied(self, merged):
+        mask = 0
+        if not merged or not self.slots:
+            return mask
+        starts, ends = merged
+        index = bisect_right(ends, self.starts[0])
+        while index < len(starts) and starts[index] < self.ends[-1]:
+            low = bisect_right(self.ends, starts[index])
+            high = bisect_left(self.starts, ends[index])
+            if high > low:
+                mask |= ((1 << (high - low)) - 1) << low
+            index += 1
+        return mask
+
+    def free(self, merged):
+        return self.full & ~self.occupied(merged)
+
+    def render(self, mask):
+        labels = self.labels
+        return [labels[index] for index in iter_bits(mask)]
+
+    def count_free(self, masks):
+        counts = [0] * len(self.slots)
+        for mask in masks:
+            for index in iter_bits(mask):
+                counts[index] += 1
+        return counts
@@ -0,0 +1,159 @@
+import threading
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from order_proj import db_router
+
+from . import office_config
+from .availability import dates_between
+from .models import Seat
+
+
+AVAILABILITY_CACHE = settings.AVAILABILITY_CACHE
+AVAILABILITY_CACHE_TIMEOUT = settings.AVAILABILITY_CACHE_TIMEOUT
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    return caches[AVAILABILITY_CACHE]
+
+
+def _room_key(room_id):
+    return f"available-seats:room:{room_id}"
+
+
+def _date_key(room_id, date):
+    return f"available-seats:room:{room_id}:{date.isoformat()}"
+
+
+def _versions(cache, keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def _freshness(date, zone):
+    now = timezone.localtime(timezone=zone)
+    return now.hour if date == now.date() else None
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+def _compute(date, room_id):
+    # Shared entries are filled from the primary; a lagging replica would
+    # cache stale availability under the version of a newer booking.
+    with db_router.primary():
+        return Seat.get_available_seats(date, room_id)
+
+
+def get_available_seats(date, room_id):
+    cache = _cache()
+    room_key, date_key = _room_key(room_id), _date_key(room_id, date)
+    versions = _versions(cache, [room_key, date_key])
+    key = f"{date_key}:{versions[room_key]}:{versions[date_key]}"
+
+    freshness = _freshness(date, office_config.for_room(room_id).zone)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == freshness:
+        _record("hits")
+        return entry[1]
+
+    _record("misses")
+    available_times_by_seat = _compute(date, room_id)
+    cache.set(key, (freshness, available_times_by_seat), AVAILABILITY_CACHE_TIMEOUT)
+    return available_times_by_seat
+
+
+async def aget_available_seats(date, room_id):
+    cache = _cache()
+    room_key, date_key = _room_key(room_id), _date_key(room_id, date)
+    versions = await cache.aget_many([room_key, date_key])
+    if len(versions) < 2:
+        versions = await sync_to_async(_versions)(cache, [room_key, date_key])
+    key = f"{date_key}:{versions[room_key]}:{versions[date_key]}"
+
+    freshness = _freshness(date, (await office_config.afor_room(room_id)).zone)
+    entry = await cache.aget(key)
+    if entry is not None and entry[0] == freshness:
+        _record("hits")
+        return entry[1]
+
+    _record("misses")
+    available_times_by_seat = await sync_to_async(_compute)(date, room_id)
+    await cache.aset(
+        key, (freshness, available_times_by_seat), AVAILABILITY_CACHE_TIMEOUT
+    )
+    return available_times_by_seat
+
+
+def _local_date(value, zone):
+    if timezone.is_naive(value):
+        return value.date()
+    return timezone.localtime(value, zone).date()
+
+
+def _expire(keys):
+    keys = set(keys)
+    if not keys:
+        return
+
+    def expire():
+        _cache().set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    transaction.on_commit(expire)
+
+
+def booking_keys(room_id, start_time, end_time):
+    zone = office_config.for_room(room_id).zone
+    return [
+        _date_key(room_id, date)
+        for date in dates_between(
+            _local_date(start_time, zone),
+            _local_date(end_time - timedelta(microseconds=1), zone),
+        )
+    ]
+
+
+def invalidate_rooms(room_ids):
+    _expire(_room_key(room_id) for room_id in room_ids)
+
+
+def invalidate_bookings(bookings):
+    _expire(
+        key
+        for booking in bookings
+        for key in booking_keys(
+            booking.seat.room_id, booking.start_time, booking.end_time
+        )
+    )
+
+
+def invalidate_keys(keys):
+    _expire(keys)
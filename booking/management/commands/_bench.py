@@ -0,0 +1,101 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from booking.models import Booking, Office, Room, Seat
+
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def create_office(rooms, seats_per_room, name="Benchmark Office"):
+    office = Office.objects.create(name=name, location="Benchmark")
+    room_objects = Room.objects.bulk_create(
+        Room(office=office, name=f"Room {index}") for index in range(rooms)
+    )
+    Seat.objects.bulk_create(
+        Seat(room=room, number=number)
+        for room in room_objects
+        for number in range(seats_per_room)
+    )
+    return office
+
+
+def create_users(count, prefix="bench"):
+    return User.objects.bulk_create(
+        User(username=f"{prefix}-{index}-{random.getrandbits(32)}")
+        for index in range(count)
+    )
+
+
+class BookingFactory:
+    def __init__(self, seat_ids, users, first_day=None):
+        if first_day is None:
+            first_day = timezone.localdate() - timedelta(days=180)
+        start_of_day = timezone.make_aware(
+            datetime.combine(first_day, datetime.min.time())
+        )
+        self.seat_ids = list(seat_ids)
+        self.users = list(users)
+        self.cursors = {seat_id: start_of_day for seat_id in self.seat_ids}
+
+    def build(self, count):
+        bookings = []
+        for index in range(count):
+            seat_id = self.seat_ids[index % len(self.seat_ids)]
+            start_time = self.cursors[seat_id] + timedelta(hours=random.randint(0, 12))
+            end_time = start_time + timedelta(hours=random.randint(1, 3))
+            self.cursors[seat_id] = end_time
+            bookings.append(
+                Booking(
+                    user=random.choice(self.users),
+                    seat_id=seat_id,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+            )
+        return bookings
+
+    def create(self, count, batch_size=5000):
+        return Booking.objects.bulk_create(self.build(count), batch_size=batch_size)
+
+
+def analyze(model):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authenticate.authentication import SnapshotJWTAuthentication
+
+from ._bench import QueryCounter, Rollback, create_users, timed
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request JWT authentication that loads the user row against "
+        "the cached user snapshot used by read endpoints. All data is rolled "
+        "back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        factory = APIRequestFactory()
+        requests = [
+            factory.get("/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+            for user in create_users(options["users"])
+        ]
+        count = options["requests"]
+
+        for label, backend in (
+            ("model user", JWTAuthentication()),
+            ("snapshot", SnapshotJWTAuthentication()),
+        ):
+
+            def authenticate():
+                for index in range(count):
+                    backend.authenticate(requests[index % len(requests)])
+
+            with QueryCounter() as counter:
+                elapsed = timed(authenticate, options["repeat"])
+            queries = counter.count / (count * options["repeat"])
+            self.stdout.write(
+                f"{label:<12} {elapsed / count * 1000:8.1f} us/request  "
+                f"{queries:.3f} queries/request"
+            )
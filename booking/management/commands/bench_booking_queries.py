@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from booking.models import Booking, Seat
+
+from ._bench import (
+    BookingFactory,
+    Rollback,
+    analyze,
+    create_office,
+    create_users,
+    timed,
+)
+
+
+def legacy_booking_history(seat_id, date, user):
+    return Booking.objects.filter(seat_id=seat_id, user=user).filter(
+        Q(start_time__date__lte=date, end_time__date__gte=date)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure conflict-check and booking-history query plans and latency "
+        "while the booking table grows. All data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000,100000",
+            help="Comma separated booking table sizes to measure at.",
+        )
+        parser.add_argument("--seats", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--without-indexes",
+            action="store_true",
+            help="Drop the booking overlap indexes first to get a baseline.",
+        )
+        parser.add_argument("--explain", action="store_true")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        try:
+            with transaction.atomic():
+                if options["without_indexes"]:
+                    self.drop_indexes()
+                self.run(sizes, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "ALTER TABLE booking_booking "
+                    "DROP CONSTRAINT IF EXISTS booking_no_active_overlap"
+                )
+            for index in Booking._meta.indexes:
+                cursor.execute(f"DROP INDEX {index.name}")
+
+    def run(self, sizes, options):
+        office = create_office(rooms=1, seats_per_room=options["seats"])
+        seat_ids = list(
+            Seat.objects.filter(room__office=office).values_list("id", flat=True)
+        )
+        users = create_users(20)
+        factory = BookingFactory(seat_ids, users)
+
+        seat_id = seat_ids[0]
+        user = users[0]
+        start_time = timezone.now() + timedelta(days=1)
+        end_time = start_time + timedelta(hours=2)
+        date = start_time.date()
+
+        queries = {
+            "has_conflicting_bookings": lambda: Booking.objects.has_conflicting_bookings(
+                seat_id, start_time, end_time
+            ),
+            "booking_history": lambda: list(
+                Booking.objects.booking_history([seat_id], [user], date)
+            ),
+            "legacy_booking_history": lambda: list(
+                legacy_booking_history(seat_id, date, user)
+            ),
+        }
+
+        self.stdout.write(f"{'rows':>10} {'query':<28} {'median ms':>10}")
+        inserted = 0
+        for size in sizes:
+            factory.create(size - inserted)
+            inserted = size
+            analyze(Booking)
+            for name, query in queries.items():
+                elapsed = timed(query, options["repeat"])
+                self.stdout.write(f"{size:>10} {name:<28} {elapsed:>10.3f}")
+            if options["explain"]:
+                self.explain(seat_id, start_time, end_time, date, user)
+
+    def explain(self, seat_id, start_time, end_time, date, user):
+        querysets = {
+            "has_conflicting_bookings": Booking.objects.filter(
+                seat=seat_id,
+                is_active=True,
+                start_time__lt=end_time,
+                end_time__gt=start_time,
+            ),
+            "booking_history": Booking.objects.booking_history([seat_id], [user], date),
+            "legacy_booking_history": legacy_booking_history(seat_id, date, user),
+        }
+        for name, queryset in querysets.items():
+            self.stdout.write(f"-- {name}")
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,96 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from booking import office_config
+from booking.models import Booking, Seat
+from booking.occupancy import compute_occupancy, load_bookings
+
+from ._bench import Rollback, analyze, create_office, create_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the occupancy report behind /api/occupancy/ for many seats over "
+        "a long horizon, split into loading bookings and computing the matrix. "
+        "All data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seats", type=int, default=5000)
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--bookings-per-seat-day", type=int, default=1)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        start_date = timezone.localdate()
+        end_date = start_date + timedelta(days=options["days"] - 1)
+        seats_per_room = max(1, options["seats"] // options["rooms"])
+        office = create_office(options["rooms"], seats_per_room)
+        seats = Seat.objects.filter(room__office=office)
+        start_time = timezone.make_aware(
+            datetime.combine(start_date, datetime.min.time())
+        )
+        end_time = start_time + timedelta(days=options["days"])
+
+        started = time.perf_counter()
+        count = self.create_bookings(options, seats, start_time)
+        analyze(Booking)
+        self.stdout.write(
+            f"bookings:       {count} ({time.perf_counter() - started:.1f}s to create)"
+        )
+
+        config = office_config.for_office(office.pk)
+        timings = {"load": [], "report": []}
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            load_bookings(seats, start_time, end_time)
+            timings["load"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            report = compute_occupancy(start_date, end_date, seats, config)
+            timings["report"].append(time.perf_counter() - started)
+
+        self.stdout.write(f"seats x slots:  {report['seats']} x {report['slots']}")
+        self.stdout.write(f"load bookings:  {min(timings['load']):.3f}s")
+        self.stdout.write(f"full report:    {min(timings['report']):.3f}s")
+        self.stdout.write(f"utilization:    {report['utilization']:.3f}")
+
+    def create_bookings(self, options, seats, first):
+        rng = np.random.default_rng(0)
+        user = create_users(1)[0]
+        seat_ids = list(seats.values_list("id", flat=True))
+        per_day = options["bookings_per_seat_day"]
+        count = len(seat_ids) * options["days"] * per_day
+        # Each booking stays inside its own slice of the day, so bookings on a
+        # seat never overlap.
+        slice_seconds = 86400 // per_day
+        quarters = slice_seconds // 900 // 2
+        slices = np.arange(options["days"] * per_day) * slice_seconds
+        starts = slices + rng.integers(0, quarters, (len(seat_ids), len(slices))) * 900
+        lengths = rng.integers(1, quarters + 1, starts.shape) * 900
+        for seat_id, seat_starts, seat_lengths in zip(seat_ids, starts, lengths):
+            Booking.objects.bulk_create(
+                Booking(
+                    user=user,
+                    seat_id=seat_id,
+                    start_time=first + timedelta(seconds=int(start)),
+                    end_time=first + timedelta(seconds=int(start + length)),
+                )
+                for start, length in zip(seat_starts, seat_lengths)
+            )
+        return count
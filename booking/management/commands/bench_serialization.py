@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from booking.models import Booking, Seat
+from booking.pagination import BookingPagination
+from booking.renderers import ORJSONRenderer
+from booking.serializers import BookingSerializer, row_mapper
+
+from ._bench import BookingFactory, Rollback, create_office, create_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare pages per second for a my-bookings page rendered through "
+        "BookingSerializer and JSONRenderer against the values() row mapper "
+        "and ORJSONRenderer. All data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=5000)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--seconds", type=float, default=3.0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        office = create_office(rooms=1, seats_per_room=20)
+        seat_ids = Seat.objects.filter(room__office=office).values_list("id", flat=True)
+        user = create_users(1)[0]
+        BookingFactory(seat_ids, [user]).create(options["bookings"])
+
+        request = Request(
+            APIRequestFactory().get("/", {"page_size": options["page_size"]})
+        )
+        bookings = Booking.objects.filter(user=user, is_active=True)
+        rows = row_mapper(BookingSerializer)
+
+        def serializer_page():
+            paginator = BookingPagination()
+            page = paginator.paginate_queryset(bookings, request)
+            return JSONRenderer().render(BookingSerializer(page, many=True).data)
+
+        def row_mapper_page():
+            paginator = BookingPagination()
+            page = paginator.paginate_queryset(rows.values(bookings), request)
+            return ORJSONRenderer().render(rows(page))
+
+        baseline = self.pages_per_second(serializer_page, options["seconds"])
+        optimized = self.pages_per_second(row_mapper_page, options["seconds"])
+
+        self.stdout.write(f"page size:      {options['page_size']}")
+        self.stdout.write(f"serializer:     {baseline:.1f} pages/s")
+        self.stdout.write(f"row mapper:     {optimized:.1f} pages/s")
+        self.stdout.write(f"speedup:        {optimized / baseline:.2f}x")
+
+    def pages_per_second(self, func, seconds):
+        pages = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            func()
+            pages += 1
+        return pages / (time.perf_counter() - started)
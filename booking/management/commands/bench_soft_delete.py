@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from booking.models import Booking, Seat
+
+from ._bench import BookingFactory, QueryCounter, Rollback, create_office, create_users
+
+
+def legacy_delete(instance):
+    instance.is_active = False
+    for related_object in instance._meta.related_objects:
+        related_manager = getattr(instance, related_object.get_accessor_name())
+        for related_instance in related_manager.all():
+            legacy_delete(related_instance)
+    instance.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the set-based soft-delete cascade with the old per-row "
+        "recursion on a generated office. All data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=10)
+        parser.add_argument("--seats-per-room", type=int, default=50)
+        parser.add_argument("--bookings", type=int, default=20000)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--skip-legacy", action="store_true")
+
+    def handle(self, *args, **options):
+        strategies = {
+            "set-based": lambda office: office.delete(chunk_size=0),
+            "chunked": lambda office: office.delete(chunk_size=options["chunk_size"]),
+        }
+        if not options["skip_legacy"]:
+            strategies["legacy recursion"] = legacy_delete
+
+        self.stdout.write(f"{'strategy':<18} {'seconds':>10} {'queries':>10}")
+        for name, strategy in strategies.items():
+            try:
+                with transaction.atomic():
+                    office = self.build(options)
+                    with QueryCounter() as queries:
+                        started = time.perf_counter()
+                        strategy(office)
+                        elapsed = time.perf_counter() - started
+                    remaining = Booking.objects.filter(
+                        seat__room__office=office, is_active=True
+                    ).count()
+                    assert remaining == 0, f"{name} left {remaining} active bookings"
+                    raise Rollback
+            except Rollback:
+                pass
+            self.stdout.write(f"{name:<18} {elapsed:>10.3f} {queries.count:>10}")
+
+    def build(self, options):
+        office = create_office(options["rooms"], options["seats_per_room"])
+        seat_ids = Seat.objects.filter(room__office=office).values_list("id", flat=True)
+        BookingFactory(seat_ids, create_users(20)).create(options["bookings"])
+        return office
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from urllib.parse import urljoin
+
+import requests
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from booking.models import Office, Room, Seat
+
+from ._bench import BookingFactory, User, create_office, create_users
+
+ENDPOINTS = ("available-seats", "list-my-bookings", "seat-list")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read throughput of a sync view under WSGI, the same view "
+        "under ASGI and its native async variant, at a given concurrency. "
+        "Requests go through Django's handlers in-process, so the numbers "
+        "show handler and thread-hop overhead rather than network costs. "
+        "With --base-url the requests go over HTTP to a running server that "
+        "uses the same database instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=ENDPOINTS, default=ENDPOINTS[0])
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--bookings", type=int, default=2000)
+        parser.add_argument(
+            "--base-url", help="Server to load, e.g. http://localhost:8000"
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the generated data."
+        )
+
+    def handle(self, *args, **options):
+        office = create_office(rooms=1, seats_per_room=20, name="Load test")
+        room = Room.objects.get(office=office)
+        users = create_users(options["concurrency"], prefix="load")
+        BookingFactory(
+            Seat.objects.filter(room=room).values_list("id", flat=True),
+            users,
+            first_day=timezone.localdate(),
+        ).create(options["bookings"])
+        tokens = [f"Bearer {AccessToken.for_user(user)}" for user in users]
+
+        endpoint = options["endpoint"]
+        params = {
+            "available-seats": {
+                "date": timezone.localdate().isoformat(),
+                "room_id": room.pk,
+            },
+        }.get(endpoint, {"page_size": 20})
+        if options["base_url"]:
+            modes = [
+                ("sync", self.run_http, reverse(endpoint)),
+                ("async", self.run_http, reverse(f"{endpoint}-async")),
+            ]
+        else:
+            modes = [
+                ("sync WSGI", self.run_wsgi, reverse(endpoint)),
+                ("sync ASGI", self.run_asgi, reverse(endpoint)),
+                ("async ASGI", self.run_asgi, reverse(f"{endpoint}-async")),
+            ]
+
+        try:
+            self.stdout.write(
+                f"{endpoint}: {options['requests']} requests, "
+                f"concurrency {options['concurrency']}"
+            )
+            for label, run, url in modes:
+                started = time.perf_counter()
+                statuses = run(url, params, tokens, options)
+                elapsed = time.perf_counter() - started
+                codes = ", ".join(
+                    f"{code}: {count}" for code, count in sorted(statuses.items())
+                )
+                self.stdout.write(
+                    f"{label:<11} {options['requests'] / elapsed:8.1f} req/s  "
+                    f"({codes})"
+                )
+        finally:
+            if not options["keep"]:
+                Office.objects.filter(pk=office.pk).delete()
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run_wsgi(self, url, params, tokens, options):
+        def fire(index):
+            client = Client(raise_request_exception=False)
+            try:
+                response = client.get(
+                    url, params, HTTP_AUTHORIZATION=tokens[index % len(tokens)]
+                )
+                return response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            return Counter(executor.map(fire, range(options["requests"])))
+
+    def run_http(self, url, params, tokens, options):
+        url = urljoin(options["base_url"], url)
+        sessions = local()
+
+        def fire(index):
+            if not hasattr(sessions, "session"):
+                sessions.session = requests.Session()
+            response = sessions.session.get(
+                url,
+                params=params,
+                headers={"Authorization": tokens[index % len(tokens)]},
+            )
+            return response.status_code
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            return Counter(executor.map(fire, range(options["requests"])))
+
+    def run_asgi(self, url, params, tokens, options):
+        async def fire(client, semaphore, index):
+            async with semaphore:
+                response = await client.get(
+                    url,
+                    params,
+                    headers={"Authorization": tokens[index % len(tokens)]},
+                )
+                return response.status_code
+
+        async def main():
+            client = AsyncClient(raise_request_exception=False)
+            semaphore = asyncio.Semaphore(options["concurrency"])
+            return Counter(
+                await asyncio.gather(
+                    *(
+                        fire(client, semaphore, index)
+                        for index in range(options["requests"])
+                    )
+                )
+            )
+
+        return asyncio.run(main())
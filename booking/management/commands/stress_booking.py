@@ -0,0 +1,104 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from booking.models import Booking, Office, Seat
+
+from ._bench import User, create_office, create_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent create-booking requests at a few hot seats and report "
+        "throughput and the number of double bookings that got through."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--seats", type=int, default=3)
+        parser.add_argument("--slots", type=int, default=8)
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the generated data."
+        )
+
+    def handle(self, *args, **options):
+        office = create_office(rooms=1, seats_per_room=options["seats"], name="Stress")
+        seat_ids = list(
+            Seat.objects.filter(room__office=office).values_list("id", flat=True)
+        )
+        users = create_users(options["concurrency"], prefix="stress")
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+
+        first_slot = timezone.make_aware(
+            datetime.combine(
+                timezone.localdate() + timedelta(days=1), datetime.min.time()
+            )
+        ).replace(hour=9)
+        url = reverse("create-booking")
+
+        def fire(index):
+            client = Client(raise_request_exception=False)
+            start_time = first_slot + timedelta(
+                hours=random.randrange(options["slots"])
+            )
+            payload = {
+                "seat": random.choice(seat_ids),
+                "start_time": start_time.isoformat(),
+                "end_time": (
+                    start_time + timedelta(hours=random.randint(1, 2))
+                ).isoformat(),
+            }
+            try:
+                response = client.post(
+                    url,
+                    payload,
+                    content_type="application/json",
+                    HTTP_AUTHORIZATION=f"Bearer {tokens[index % len(tokens)]}",
+                )
+                return response.status_code
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            statuses = Counter(executor.map(fire, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        double_bookings = self.count_double_bookings(seat_ids)
+
+        self.stdout.write(f"requests:        {options['requests']}")
+        self.stdout.write(f"concurrency:     {options['concurrency']}")
+        self.stdout.write(f"elapsed:         {elapsed:.2f}s")
+        self.stdout.write(f"throughput:      {options['requests'] / elapsed:.1f} req/s")
+        for code, count in sorted(statuses.items()):
+            self.stdout.write(f"status {code}:      {count}")
+        self.stdout.write(f"double bookings: {double_bookings}")
+
+        if not options["keep"]:
+            Office.objects.filter(pk=office.pk).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def count_double_bookings(self, seat_ids):
+        bookings = Booking.objects.filter(seat__in=seat_ids, is_active=True)
+        return (
+            bookings.filter(
+                seat__booking__is_active=True,
+                seat__booking__id__gt=F("id"),
+                seat__booking__start_time__lt=F("end_time"),
+                seat__booking__end_time__gt=F("start_time"),
+            )
+            .values("id")
+            .distinct()
+            .count()
+        )
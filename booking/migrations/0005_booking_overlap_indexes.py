@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:22
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def deactivate_overlapping_bookings(apps, schema_editor):
+    # The exclusion constraint cannot be added while active bookings overlap,
+    # so keep the earliest of each overlapping run per seat and deactivate the
+    # rest.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Booking = apps.get_model("booking", "Booking")
+    bookings = Booking.objects.using(schema_editor.connection.alias).filter(
+        is_active=True
+    )
+    overlapping = bookings.filter(
+        seat_id=OuterRef("seat_id"),
+        start_time__lt=OuterRef("end_time"),
+        end_time__gt=OuterRef("start_time"),
+    ).exclude(pk=OuterRef("pk"))
+    seat_ids = (
+        bookings.filter(Exists(overlapping))
+        .values_list("seat_id", flat=True)
+        .distinct()
+    )
+    for seat_id in list(seat_ids):
+        deactivated = []
+        kept_until = None
+        for pk, start_time, end_time in (
+            bookings.filter(seat_id=seat_id)
+            .order_by("start_time", "pk")
+            .values_list("pk", "start_time", "end_time")
+        ):
+            if kept_until is not None and start_time < kept_until:
+                deactivated.append(pk)
+            else:
+                kept_until = end_time
+        bookings.filter(pk__in=deactivated).update(is_active=False)
+
+
+def add_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE booking_booking ADD CONSTRAINT booking_no_active_overlap "
+        "EXCLUDE USING gist "
+        "(seat_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+        "WHERE (is_active)"
+    )
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE booking_booking DROP CONSTRAINT IF EXISTS booking_no_active_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0004_booking_created_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["seat", "start_time", "end_time"],
+                name="booking_active_seat_range_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["seat", "user", "start_time"],
+                name="booking_seat_user_start_idx",
+            ),
+        ),
+        migrations.RunPython(
+            deactivate_overlapping_bookings, migrations.RunPython.noop
+        ),
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
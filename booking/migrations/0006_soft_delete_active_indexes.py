@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_booking_overlap_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="office",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["id"],
+                name="office_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="room",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["office", "id"],
+                name="room_active_office_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="seat",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["room", "id"],
+                name="seat_active_room_idx",
+            ),
+        ),
+    ]
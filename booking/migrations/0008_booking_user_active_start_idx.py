@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0007_booking_series"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "is_active", "start_time"],
+                name="booking_user_active_start_idx",
+            ),
+        ),
+    ]
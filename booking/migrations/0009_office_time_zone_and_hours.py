@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:46
+
+import booking.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0008_booking_user_active_start_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="office",
+            name="closes_at",
+            field=models.TimeField(
+                blank=True, help_text="Empty for END_OF_WORK_HOUR.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="office",
+            name="opens_at",
+            field=models.TimeField(
+                blank=True, help_text="Empty for START_OF_WORK_HOUR.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="office",
+            name="time_zone",
+            field=models.CharField(
+                blank=True,
+                help_text="IANA time zone, empty for the server TIME_ZONE.",
+                max_length=64,
+                validators=[booking.models.validate_time_zone],
+            ),
+        ),
+    ]
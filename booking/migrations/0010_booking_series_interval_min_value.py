@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0009_office_time_zone_and_hours"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bookingseries",
+            name="interval",
+            field=models.PositiveIntegerField(
+                default=1, validators=[django.core.validators.MinValueValidator(1)]
+            ),
+        ),
+    ]
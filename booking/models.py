@@ -1,113 +1,433 @@
-from datetime import datetime, timedelta
+import heapq
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 
+from . import office_config
+from .availability import (
+    dates_between,
+    day_bounds,
+    free_gaps,
+    group_by_seat,
+    merge_intervals,
+)
+from .schedule import bookable_grid
+
 
 User = get_user_model()
 
-BOOKING_DURATION = settings.BOOKING_DURATION
-END_OF_WORK_HOUR = settings.END_OF_WORK_HOUR
-START_OF_WORK_HOUR = settings.START_OF_WORK_HOUR
-START_OF_WORK_MINUTE = settings.START_OF_WORK_MINUTE
-END_OF_WORK_MINUTE = settings.END_OF_WORK_MINUTE
+SOFT_DELETE_CHUNK_SIZE = settings.SOFT_DELETE_CHUNK_SIZE
+MAX_BOOKING_DURATION = timedelta(seconds=settings.MAX_BOOKING_DURATION)
+
+
+class SoftDeleteManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+    def all_with_deleted(self):
+        return super().get_queryset()
 
 
 class SoftDeleteModel(models.Model):
     is_active = models.BooleanField(default=True)
 
+    objects = SoftDeleteManager()
+
     class Meta:
         abstract = True
 
-    def delete(self, *args, **kwargs):
-        self.is_active = False
-        self._delete_related()
-        self.save()
-
-    def _delete_related(self):
-        for related_object in self._meta.related_objects:
-            related_name = related_object.get_accessor_name()
-            related_manager = getattr(self, related_name)
-            if hasattr(related_manager, "all_with_deleted"):
-                for related_instance in related_manager.all_with_deleted():
-                    related_instance.delete()
+    def delete(self, *args, chunk_size=None, **kwargs):
+        if chunk_size is None:
+            chunk_size = SOFT_DELETE_CHUNK_SIZE
+        with nullcontext() if chunk_size else transaction.atomic():
+            self._delete_related(chunk_size)
+            self.is_active = False
+            self.save()
+
+    def _delete_related(self, chunk_size=None):
+        levels = []
+        pending = [(type(self), type(self)._base_manager.filter(pk=self.pk))]
+        while pending:
+            parent_model, parents = pending.pop()
+            for related_object in parent_model._meta.related_objects:
+                related_model = related_object.related_model
+                children = related_model._base_manager.filter(
+                    **{f"{related_object.field.name}__in": parents.values("pk")}
+                )
+                levels.append((related_model, children))
+                if issubclass(related_model, SoftDeleteModel):
+                    pending.append((related_model, children))
+
+        for related_model, children in reversed(levels):
+            if not issubclass(related_model, SoftDeleteModel):
+                children.delete()
+            elif chunk_size:
+                _deactivate_in_chunks(children, chunk_size)
             else:
-                for related_instance in related_manager.all():
-                    related_instance.delete()
+                children.filter(is_active=True).update(is_active=False)
+
+
+def _deactivate_in_chunks(queryset, chunk_size):
+    while True:
+        with transaction.atomic():
+            pks = list(
+                queryset.filter(is_active=True).values_list("pk", flat=True)[
+                    :chunk_size
+                ]
+            )
+            if not pks:
+                return
+            queryset.model._base_manager.filter(pk__in=pks).update(is_active=False)
+
+
+def validate_time_zone(value):
+    try:
+        ZoneInfo(value)
+    except (ValueError, ZoneInfoNotFoundError):
+        raise ValidationError(f"Unknown time zone {value!r}.")
 
 
 class Office(SoftDeleteModel):
     name = models.CharField(max_length=100)
     location = models.CharField(max_length=100)
+    time_zone = models.CharField(
+        max_length=64,
+        blank=True,
+        validators=[validate_time_zone],
+        help_text="IANA time zone, empty for the server TIME_ZONE.",
+    )
+    opens_at = models.TimeField(
+        null=True, blank=True, help_text="Empty for START_OF_WORK_HOUR."
+    )
+    closes_at = models.TimeField(
+        null=True, blank=True, help_text="Empty for END_OF_WORK_HOUR."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=Q(is_active=True),
+                name="office_active_idx",
+            ),
+        ]
 
 
 class Room(SoftDeleteModel):
     office = models.ForeignKey(Office, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["office", "id"],
+                condition=Q(is_active=True),
+                name="room_active_office_idx",
+            ),
+        ]
+
 
 class Seat(SoftDeleteModel):
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     number = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["room", "id"],
+                condition=Q(is_active=True),
+                name="seat_active_room_idx",
+            ),
+        ]
+
     @staticmethod
     def get_available_seats(date, room_id):
-        timezone.activate(timezone.get_current_timezone())
-
-        start_of_day = datetime.combine(date, datetime.min.time())
-        start_of_day = timezone.make_aware(start_of_day)
-
-        seats = Seat.objects.filter(room=room_id)
-        bookings = Booking.objects.filter(is_active=True)
-        available_times_by_seat = {}
-        for seat in seats:
-            interval_start = max(
-                start_of_day.replace(hour=START_OF_WORK_HOUR),
-                timezone.localtime(timezone.now()).replace(
-                    minute=0, second=0, microsecond=0
+        for _, available_times_by_seat in Seat.iter_available_seats(
+            date, date, [room_id]
+        ):
+            return available_times_by_seat
+
+    @staticmethod
+    def iter_available_seats(start_date, end_date, room_ids):
+        rooms_by_config = defaultdict(list)
+        for room_id in room_ids:
+            rooms_by_config[office_config.for_room(room_id)].append(room_id)
+
+        groups = []
+        for config, config_room_ids in rooms_by_config.items():
+            seat_ids = list(
+                Seat.objects.filter(room__in=config_room_ids).values_list(
+                    "id", flat=True
                 )
-                + timedelta(hours=1),
             )
-            end_of_day = start_of_day + timedelta(days=1) - timedelta(seconds=1)
-            available_times = []
-            while interval_start <= end_of_day.replace(hour=END_OF_WORK_HOUR, minute=0):
-                interval_end = interval_start + timedelta(hours=BOOKING_DURATION)
-
-                if not any(
-                    interval_start < booking.end_time
-                    and interval_end > booking.start_time
-                    and booking.seat == seat
-                    for booking in bookings
-                ):
-                    available_times.append(
-                        (
-                            interval_start.strftime("%H:%M"),
-                            interval_end.strftime("%H:%M"),
-                        )
-                    )
-                interval_start += timedelta(hours=BOOKING_DURATION)
-            available_times_by_seat[seat.id] = available_times
-        return available_times_by_seat
-
-
-class BookingManager(models.Manager):
+            bookings = Booking.objects.filter(seat__room__in=config_room_ids)
+            groups.append(
+                iter_free_slots(start_date, end_date, seat_ids, bookings, config)
+            )
+
+        for days in zip(*groups):
+            yield days[0][0], {
+                seat_id: grid.render(mask)
+                for _, grid, masks in days
+                for seat_id, mask in masks.items()
+            }
+
+    @staticmethod
+    def get_office_availability(date, office_id, config=None):
+        rooms = list(Room.objects.filter(office=office_id).values("id", "name"))
+        seats = list(
+            Seat.objects.filter(room__office=office_id).values_list("id", "room_id")
+        )
+        bookings = Booking.objects.filter(seat__room__office=office_id)
+        _, grid, masks = next(
+            iter_free_slots(
+                date,
+                date,
+                [seat_id for seat_id, _ in seats],
+                bookings,
+                config or office_config.for_office(office_id),
+            )
+        )
+
+        masks_by_room = {room["id"]: {} for room in rooms}
+        for seat_id, room_id in seats:
+            masks_by_room[room_id][seat_id] = masks[seat_id]
+
+        for room in rooms:
+            room_masks = masks_by_room[room["id"]]
+            room["seats"] = len(room_masks)
+            room["free_seats"] = sum(1 for mask in room_masks.values() if mask)
+            room["free_seats_by_slot"] = [
+                {"start": start, "end": end, "free_seats": free_seats}
+                for (start, end), free_seats in zip(
+                    grid.labels, grid.count_free(room_masks.values())
+                )
+            ]
+            room["time_by_seat"] = {
+                seat_id: grid.render(mask) for seat_id, mask in room_masks.items()
+            }
+        return rooms
+
+
+def iter_free_slots(
+    start_date, end_date, seat_ids, bookings, config=office_config.DEFAULT_CONFIG
+):
+    days = [
+        (date, bookable_grid(date, config.hours, config.tz_name))
+        for date in dates_between(start_date, end_date)
+    ]
+    slots = [slot for _, grid in days for slot in grid.slots]
+
+    merged_by_seat = {}
+    if slots and seat_ids:
+        rows = bookings.filter(
+            start_time__lt=slots[-1][1], end_time__gt=slots[0][0]
+        ).values_list("seat_id", "start_time", "end_time")
+        merged_by_seat = {
+            seat_id: merge_intervals(intervals)
+            for seat_id, intervals in group_by_seat(
+                (seat_id, start_time.timestamp(), end_time.timestamp())
+                for seat_id, start_time, end_time in rows.iterator()
+            ).items()
+        }
+
+    for date, grid in days:
+        yield date, grid, {
+            seat_id: grid.free(merged_by_seat.get(seat_id)) for seat_id in seat_ids
+        }
+
+
+class BookingManager(SoftDeleteManager):
+    def lock_seats(self, seat_ids):
+        return list(
+            Seat.objects.select_for_update()
+            .filter(pk__in=seat_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
     def has_conflicting_bookings(self, seat, start_time, end_time):
         overlaps_query = Q(start_time__lt=end_time, end_time__gt=start_time)
-        conflicting_bookings = self.filter(seat=seat, is_active=True).filter(
-            overlaps_query
+        conflicting_bookings = (
+            self.using(DEFAULT_DB_ALIAS)
+            .filter(seat=seat, is_active=True)
+            .filter(overlaps_query)
         )
         return conflicting_bookings.exists()
 
-    def booking_history(self, seat_id, date, user):
-        overlaps_query = Q(start_time__date__lte=date, end_time__date__gte=date)
-        history_bookings = self.filter(seat_id=seat_id, user=user).filter(
-            overlaps_query
+    def conflicting_intervals(self, intervals):
+        bounds = {}
+        for seat_id, start_time, end_time in intervals:
+            lower, upper = bounds.get(seat_id, (start_time, end_time))
+            bounds[seat_id] = (min(lower, start_time), max(upper, end_time))
+
+        overlaps_query = Q()
+        for seat_id, (start_time, end_time) in bounds.items():
+            overlaps_query |= Q(
+                seat_id=seat_id, start_time__lt=end_time, end_time__gt=start_time
+            )
+        if not overlaps_query:
+            return self.none().values_list("seat_id", "start_time", "end_time")
+        return (
+            self.using(DEFAULT_DB_ALIAS)
+            .filter(is_active=True)
+            .filter(overlaps_query)
+            .values_list("seat_id", "start_time", "end_time")
+        )
+
+    def find_free_seats(
+        self, seats, window_start, window_end, duration, strategy="first_fit", limit=10
+    ):
+        seat_rooms = dict(seats.values_list("id", "room_id"))
+        rows = self.filter(
+            seat__in=seats.values("id"),
+            start_time__lt=window_end,
+            end_time__gt=window_start,
+        ).values_list("seat_id", "start_time", "end_time")
+        merged_by_seat = {
+            seat_id: merge_intervals(intervals)
+            for seat_id, intervals in group_by_seat(rows).items()
+        }
+
+        candidates = []
+        for seat_id, room_id in seat_rooms.items():
+            gaps = [
+                (gap_start, gap_end)
+                for gap_start, gap_end in free_gaps(
+                    merged_by_seat.get(seat_id), window_start, window_end
+                )
+                if gap_end - gap_start >= duration
+            ]
+            if not gaps:
+                continue
+            if strategy == "best_fit":
+                gap_start, gap_end = min(gaps, key=lambda gap: gap[1] - gap[0])
+                rank = (gap_end - gap_start, gap_start, seat_id)
+            else:
+                gap_start, gap_end = gaps[0]
+                rank = (gap_start, seat_id)
+            candidates.append(
+                (
+                    rank,
+                    {
+                        "seat": seat_id,
+                        "room": room_id,
+                        "start_time": gap_start,
+                        "end_time": gap_start + duration,
+                    },
+                )
+            )
+        return [candidate for _, candidate in heapq.nsmallest(limit, candidates)]
+
+    def booking_history(self, seat_ids, users, start_date, end_date=None):
+        seats_by_zone = defaultdict(list)
+        for seat_id, config in office_config.for_seats(seat_ids).items():
+            seats_by_zone[config.tz_name].append(seat_id)
+
+        overlaps_query = Q(pk__in=[])
+        for tz_name, zone_seat_ids in seats_by_zone.items():
+            day_start, day_end = day_bounds(
+                start_date, end_date or start_date, ZoneInfo(tz_name)
+            )
+            overlaps_query |= Q(
+                seat__in=zone_seat_ids,
+                start_time__gt=day_start - MAX_BOOKING_DURATION,
+                start_time__lt=day_end,
+                end_time__gte=day_start,
+            )
+        # History includes cancelled bookings.
+        history_bookings = (
+            self.all_with_deleted().filter(user__in=users).filter(overlaps_query)
         )
         return history_bookings
 
+    def status_filter(self, status, now=None):
+        # start_time bounds are implied by end_time but keep the filter on the
+        # (user, is_active, start_time) index.
+        now = now or timezone.now()
+        if status == "upcoming":
+            return Q(start_time__gt=now - MAX_BOOKING_DURATION, end_time__gt=now)
+        return Q(start_time__lt=now, end_time__lte=now)
+
+    def for_user(self, user, start=None, end=None, status=None):
+        bookings = self.filter(user_id=user.pk, is_active=True)
+        if start is not None:
+            bookings = bookings.filter(start_time__gte=start)
+        if end is not None:
+            bookings = bookings.filter(start_time__lt=end)
+        if status is not None:
+            bookings = bookings.filter(self.status_filter(status))
+        return bookings
+
+    def status_counts(self):
+        now = timezone.now()
+        return {
+            "total": Count("id"),
+            "upcoming": Count("id", filter=self.status_filter("upcoming", now)),
+            "past": Count("id", filter=self.status_filter("past", now)),
+        }
+
+    def status_summary(self, bookings):
+        return bookings.aggregate(**self.status_counts())
+
+    async def astatus_summary(self, bookings):
+        return await bookings.aaggregate(**self.status_counts())
+
+
+class BookingSeries(SoftDeleteModel):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    FREQUENCY_CHOICES = [(DAILY, "Daily"), (WEEKLY, "Weekly")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    until = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def step(self):
+        return timedelta(
+            days=self.interval * (7 if self.frequency == self.WEEKLY else 1)
+        )
+
+    def occurrences(self):
+        step = self.step()
+        start_time = timezone.localtime(
+            self.start_time, office_config.for_seat(self.seat_id).zone
+        )
+        duration = self.end_time - self.start_time
+        while start_time.date() <= self.until:
+            yield start_time, start_time + duration
+            start_time += step
+
+    def last_end_time(self):
+        last_end_time = None
+        for _, last_end_time in self.occurrences():
+            pass
+        return last_end_time
+
+    def cancel(self, now=None):
+        # Occurrences that have already started stay on record.
+        now = now or timezone.now()
+        with transaction.atomic():
+            Booking.objects.filter(series=self, start_time__gte=now).update(
+                is_active=False
+            )
+            self.is_active = False
+            self.save()
+
 
 class Booking(SoftDeleteModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -115,9 +435,29 @@ class Booking(SoftDeleteModel):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    series = models.ForeignKey(
+        BookingSeries, null=True, blank=True, on_delete=models.CASCADE
+    )
 
     objects = BookingManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["seat", "start_time", "end_time"],
+                condition=Q(is_active=True),
+                name="booking_active_seat_range_idx",
+            ),
+            models.Index(
+                fields=["seat", "user", "start_time"],
+                name="booking_seat_user_start_idx",
+            ),
+            models.Index(
+                fields=["user", "is_active", "start_time"],
+                name="booking_user_active_start_idx",
+            ),
+        ]
+
     def is_expired(self):
         return self.end_time < timezone.now()
 
@@ -0,0 +1,141 @@
+import numpy as np
+from django.db.models import FloatField, Func
+
+from . import office_config
+from .availability import dates_between
+from .models import Booking, Seat
+from .schedule import day_grid
+
+
+def slot_grid(start_date, end_date, config=office_config.DEFAULT_CONFIG):
+    grids = [
+        day_grid(date, config.hours, config.tz_name)
+        for date in dates_between(start_date, end_date)
+    ]
+    slots = [slot for grid in grids for slot in grid.slots]
+    starts = np.array([start for grid in grids for start in grid.starts])
+    ends = np.array([end for grid in grids for end in grid.ends])
+    labels = np.array([start for grid in grids for start, _ in grid.labels], dtype=str)
+    return slots, starts, ends, labels
+
+
+def occupancy_matrix(seat_index, starts, ends, slot_starts, slot_ends, seats):
+    first = np.searchsorted(slot_ends, starts, side="right")
+    last = np.searchsorted(slot_starts, ends, side="left")
+    covered = last > first
+
+    width = len(slot_starts) + 1
+    rows = seat_index[covered] * width
+    size = seats * width
+    coverage = np.bincount(rows + first[covered], minlength=size).astype(np.int32)
+    coverage -= np.bincount(rows + last[covered], minlength=size).astype(np.int32)
+    coverage = coverage.reshape(seats, width)
+    return np.cumsum(coverage, axis=1, out=coverage)[:, :-1] > 0
+
+
+def _grouped_mean(matrix_sums, groups, group_sizes):
+    totals = np.bincount(groups, weights=matrix_sums, minlength=len(group_sizes))
+    return np.divide(
+        totals, group_sizes, out=np.zeros_like(totals), where=group_sizes > 0
+    )
+
+
+class Epoch(Func):
+    output_field = FloatField()
+    template = "EXTRACT(EPOCH FROM %(expressions)s)::double precision"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Django stores "YYYY-MM-DD HH:MM:SS[.ffffff]" in UTC; add the
+        # fraction back since strftime('%s') truncates it.
+        return self.as_sql(
+            compiler,
+            connection,
+            template=(
+                "(CAST(strftime('%%%%s', %(expressions)s) AS REAL)"
+                " + CAST(substr(%(expressions)s, 20) AS REAL))"
+            ),
+            **extra_context,
+        )
+
+
+def load_bookings(seats, start_time, end_time):
+    # Epoch seconds come straight from SQL, which skips building a datetime
+    # per row.
+    rows = np.array(
+        Booking.objects.filter(
+            seat__in=seats.values("id"),
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        ).values_list("seat_id", Epoch("start_time"), Epoch("end_time")),
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    return rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2]
+
+
+def compute_occupancy(start_date, end_date, seats, config):
+    seat_rows = list(seats.order_by("id").values_list("id", "room_id"))
+    seat_ids = np.array([seat_id for seat_id, _ in seat_rows], dtype=np.int64)
+    room_ids, room_index = np.unique(
+        np.array([room_id for _, room_id in seat_rows], dtype=np.int64),
+        return_inverse=True,
+    )
+    slots, slot_starts, slot_ends, labels = slot_grid(start_date, end_date, config)
+
+    if seat_rows and slots:
+        booking_seats, starts, ends = load_bookings(seats, slots[0][0], slots[-1][1])
+    else:
+        booking_seats = np.zeros(0, dtype=np.int64)
+        starts = ends = np.zeros(0, dtype=np.float64)
+
+    occupied = occupancy_matrix(
+        np.searchsorted(seat_ids, booking_seats),
+        starts,
+        ends,
+        slot_starts,
+        slot_ends,
+        len(seat_ids),
+    )
+    return summarize(occupied, seat_ids, room_ids, room_index, labels)
+
+
+def summarize(occupied, seat_ids, room_ids, room_index, labels):
+    slots = occupied.shape[1]
+    per_seat = occupied.sum(axis=1, dtype=np.int64)
+    hours, hour_index = np.unique(labels, return_inverse=True)
+    per_slot = occupied.sum(axis=0, dtype=np.int64)
+
+    seat_utilization = per_seat / slots if slots else np.zeros(len(seat_ids))
+    room_utilization = _grouped_mean(
+        per_seat, room_index, np.bincount(room_index, minlength=len(room_ids)) * slots
+    )
+    hour_utilization = _grouped_mean(
+        per_slot,
+        hour_index,
+        np.bincount(hour_index, minlength=len(hours)) * len(seat_ids),
+    )
+    return {
+        "slots": slots,
+        "seats": len(seat_ids),
+        "utilization": float(occupied.mean()) if occupied.size else 0.0,
+        "by_room": dict(zip(room_ids.tolist(), room_utilization.tolist())),
+        "by_seat": dict(zip(seat_ids.tolist(), seat_utilization.tolist())),
+        "by_hour": dict(zip(hours.tolist(), hour_utilization.tolist())),
+    }
+
+
+def office_occupancy(start_date, end_date, office_id):
+    return compute_occupancy(
+        start_date,
+        end_date,
+        Seat.objects.filter(room__office=office_id),
+        office_config.for_office(office_id),
+    )
+
+
+def room_occupancy(start_date, end_date, room_id):
+    return compute_occupancy(
+        start_date,
+        end_date,
+        Seat.objects.filter(room=room_id),
+        office_config.for_room(room_id),
+    )
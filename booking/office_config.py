@@ -0,0 +1,165 @@
+import threading
+import time
+from functools import partial
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from .schedule import DEFAULT_WORKING_HOURS, WorkingHours
+
+
+OFFICE_CONFIG_TTL = settings.OFFICE_CONFIG_TTL
+
+OFFICE_FIELDS = ("time_zone", "opens_at", "closes_at")
+
+
+class OfficeConfig(NamedTuple):
+    hours: WorkingHours
+    tz_name: str
+
+    @property
+    def zone(self):
+        return ZoneInfo(self.tz_name)
+
+
+DEFAULT_CONFIG = OfficeConfig(DEFAULT_WORKING_HOURS, settings.TIME_ZONE)
+
+_lock = threading.Lock()
+_offices = {}
+_rooms = {}
+_seats = {}
+_loaded_at = time.monotonic()
+
+
+def _minutes(value, default):
+    return default if value is None else value.hour * 60 + value.minute
+
+
+def build_config(time_zone, opens_at, closes_at):
+    return OfficeConfig(
+        WorkingHours(
+            opening=_minutes(opens_at, DEFAULT_WORKING_HOURS.opening),
+            closing=_minutes(closes_at, DEFAULT_WORKING_HOURS.closing),
+            slot_minutes=DEFAULT_WORKING_HOURS.slot_minutes,
+        ),
+        time_zone or settings.TIME_ZONE,
+    )
+
+
+def from_office(office):
+    return build_config(office.time_zone, office.opens_at, office.closes_at)
+
+
+def _expire_stale():
+    global _loaded_at
+    if time.monotonic() - _loaded_at > OFFICE_CONFIG_TTL:
+        with _lock:
+            if time.monotonic() - _loaded_at > OFFICE_CONFIG_TTL:
+                _offices.clear()
+                _rooms.clear()
+                _seats.clear()
+                _loaded_at = time.monotonic()
+
+
+def for_office(office_id):
+    # Another thread may clear the dicts at any time, so read each entry once.
+    _expire_stale()
+    config = _offices.get(office_id)
+    if config is None:
+        row = (
+            apps.get_model("booking", "Office")
+            ._base_manager.filter(pk=office_id)
+            .values_list(*OFFICE_FIELDS)
+            .first()
+        )
+        config = DEFAULT_CONFIG if row is None else build_config(*row)
+        _offices[office_id] = config
+    return config
+
+
+def _room_rows(room_id):
+    return (
+        apps.get_model("booking", "Room")
+        ._base_manager.filter(pk=room_id)
+        .values_list("office_id", *(f"office__{name}" for name in OFFICE_FIELDS))
+    )
+
+
+def _add_room(room_id, row):
+    if row is None:
+        return DEFAULT_CONFIG
+    office_id, *office = row
+    config = _offices.setdefault(office_id, build_config(*office))
+    _rooms[room_id] = office_id
+    return config
+
+
+def for_room(room_id):
+    _expire_stale()
+    office_id = _rooms.get(room_id)
+    if office_id is None:
+        return _add_room(room_id, _room_rows(room_id).first())
+    return for_office(office_id)
+
+
+async def afor_room(room_id):
+    _expire_stale()
+    office_id = _rooms.get(room_id)
+    if office_id is None:
+        return _add_room(room_id, await _room_rows(room_id).afirst())
+    config = _offices.get(office_id)
+    if config is None:
+        _rooms.pop(room_id, None)
+        return await afor_room(room_id)
+    return config
+
+
+def for_seats(seat_ids):
+    _expire_stale()
+    rooms = {seat_id: _seats.get(seat_id) for seat_id in seat_ids}
+    missing = [seat_id for seat_id, room_id in rooms.items() if room_id is None]
+    if missing:
+        rows = (
+            apps.get_model("booking", "Seat")
+            ._base_manager.filter(pk__in=missing)
+            .values_list(
+                "id",
+                "room_id",
+                "room__office_id",
+                *(f"room__office__{name}" for name in OFFICE_FIELDS),
+            )
+        )
+        for seat_id, room_id, office_id, *office in rows:
+            _offices.setdefault(office_id, build_config(*office))
+            _rooms.setdefault(room_id, office_id)
+            _seats[seat_id] = rooms[seat_id] = room_id
+    return {
+        seat_id: DEFAULT_CONFIG if room_id is None else for_room(room_id)
+        for seat_id, room_id in rooms.items()
+    }
+
+
+def for_seat(seat_id):
+    return for_seats([seat_id])[seat_id]
+
+
+def _remember(entries, key, value):
+    # Drop the entry now and only cache the new value once it is committed,
+    # so a rolled back save never leaves it behind.
+    entries.pop(key, None)
+    transaction.on_commit(partial(entries.__setitem__, key, value))
+
+
+def remember_office(office):
+    _remember(_offices, office.pk, from_office(office))
+
+
+def remember_room(room):
+    _remember(_rooms, room.pk, room.office_id)
+
+
+def remember_seat(seat):
+    _remember(_seats, seat.pk, seat.room_id)
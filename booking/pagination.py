@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+INVALID_CURSOR = "Invalid cursor."
+
+
+def _isoformat(value):
+    # Keep full microsecond precision; DjangoJSONEncoder rounds to milliseconds.
+    return value.isoformat()
+
+
+def _keyset_filter(fields, values):
+    (name, lookup), value = fields[0], values[0]
+    if len(fields) == 1:
+        return Q(**{f"{name}__{lookup}": value})
+    return Q(**{f"{name}__{lookup}e": value}) & (
+        Q(**{f"{name}__{lookup}": value}) | _keyset_filter(fields[1:], values[1:])
+    )
+
+
+class KeysetPagination(pagination.BasePagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page(
+            [row async for row in self.page_queryset(queryset, request)]
+        )
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = [
+            (name[1:], "lt") if name.startswith("-") else (name, "gt")
+            for name in self.ordering
+        ]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(_keyset_filter(self.fields, position))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(INVALID_CURSOR)
+
+    def encode_cursor(self, row):
+        values = [
+            row[name] if isinstance(row, dict) else getattr(row, name)
+            for name, _ in self.fields
+        ]
+        encoded = json.dumps(values, default=_isoformat).encode()
+        return base64.urlsafe_b64encode(encoded).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class BookingPagination(KeysetPagination):
+    ordering = ("start_time", "id")
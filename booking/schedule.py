@@ -0,0 +1,63 @@
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+from .availability import SlotGrid
+
+
+class WorkingHours(NamedTuple):
+    opening: int
+    closing: int
+    slot_minutes: int
+
+
+DEFAULT_WORKING_HOURS = WorkingHours(
+    opening=settings.START_OF_WORK_HOUR * 60 + settings.START_OF_WORK_MINUTE,
+    closing=(settings.END_OF_WORK_HOUR + 1) * 60 + settings.END_OF_WORK_MINUTE,
+    slot_minutes=settings.BOOKING_DURATION * 60,
+)
+
+
+def _label(minutes):
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+@lru_cache(maxsize=None)
+def slot_offsets(hours):
+    last_start = hours.closing - hours.slot_minutes
+    return tuple(
+        (start, start + hours.slot_minutes)
+        for start in range(hours.opening, last_start + 1, hours.slot_minutes)
+    )
+
+
+@lru_cache(maxsize=None)
+def slot_labels(hours):
+    return tuple((_label(start), _label(end)) for start, end in slot_offsets(hours))
+
+
+@lru_cache(maxsize=4096)
+def day_grid(date, hours=DEFAULT_WORKING_HOURS, tz_name=settings.TIME_ZONE):
+    midnight = datetime.combine(date, time(), tzinfo=ZoneInfo(tz_name))
+    slots = [
+        (midnight + timedelta(minutes=start), midnight + timedelta(minutes=end))
+        for start, end in slot_offsets(hours)
+    ]
+    return SlotGrid(
+        slots,
+        labels=list(slot_labels(hours)),
+        starts=[start.timestamp() for start, _ in slots],
+        ends=[end.timestamp() for _, end in slots],
+    )
+
+
+def bookable_grid(
+    date, hours=DEFAULT_WORKING_HOURS, tz_name=settings.TIME_ZONE, now=None
+):
+    now = timezone.localtime(now, ZoneInfo(tz_name))
+    cutoff = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return day_grid(date, hours, tz_name).since(cutoff.timestamp())
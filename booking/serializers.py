@@ -1,84 +1,326 @@
 from datetime import datetime
+from functools import cache
 import pytz
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from django.conf import settings
-from .models import Office, Room, Seat, Booking
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from . import office_config
+from .models import Office, Room, Seat, Booking, BookingSeries
 
 MIN_BOOKING_DURATION = settings.MIN_BOOKING_DURATION
 MAX_BOOKING_DURATION = settings.MAX_BOOKING_DURATION
+MAX_AVAILABILITY_RANGE_DAYS = settings.MAX_AVAILABILITY_RANGE_DAYS
+MAX_OCCUPANCY_RANGE_DAYS = settings.MAX_OCCUPANCY_RANGE_DAYS
+MAX_SERIES_OCCURRENCES = settings.MAX_SERIES_OCCURRENCES
 
 
-class OfficeSerializer(serializers.ModelSerializer):
+def parse_expand(value):
+    tree = {}
+    for path in (value or "").split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class ExpandableSerializerMixin:
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.expand = {
+            name: children
+            for name, children in (expand or {}).items()
+            if name in self.expandable_fields
+        }
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name, children in self.expand.items():
+            fields[name] = self.expandable_fields[name](read_only=True, expand=children)
+        return fields
+
+    @classmethod
+    def related_paths(cls, expand, prefix=""):
+        paths = []
+        for name, children in expand.items():
+            if name not in cls.expandable_fields:
+                continue
+            path = f"{prefix}{name}"
+            nested = cls.expandable_fields[name].related_paths(children, f"{path}__")
+            paths += nested or [path]
+        return paths
+
+    @classmethod
+    def select_expanded(cls, queryset, expand):
+        paths = cls.related_paths(expand)
+        return queryset.select_related(*paths) if paths else queryset
+
+
+class OfficeSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Office
         fields = "__all__"
 
+    def validate(self, data):
+        opens_at = data.get("opens_at", getattr(self.instance, "opens_at", None))
+        closes_at = data.get("closes_at", getattr(self.instance, "closes_at", None))
+        if opens_at and closes_at and opens_at >= closes_at:
+            raise serializers.ValidationError("opens_at must be before closes_at.")
+        return data
+
+
+class RoomSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {"office": OfficeSerializer}
 
-class RoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
         fields = "__all__"
 
 
-class SeatSerializer(serializers.ModelSerializer):
+class SeatSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {"room": RoomSerializer}
+
     class Meta:
         model = Seat
         fields = "__all__"
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class RowMapper:
+    identity_fields = (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.IntegerField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, serializer_class):
+        opts = serializer_class.Meta.model._meta
+        self.columns, self.renames, self.converters = [], [], []
+        self.datetimes = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                raise TypeError(f"Cannot map nested serializer field {name!r}.")
+            column = opts.get_field(field.source).attname
+            self.columns.append(column)
+            if column != name:
+                self.renames.append((column, name))
+            if self.is_iso_datetime(field):
+                self.datetimes.append(name)
+            elif not isinstance(field, self.identity_fields):
+                self.converters.append((name, field.to_representation))
+
+    @staticmethod
+    def is_iso_datetime(field):
+        # Same output as DateTimeField.to_representation for aware values,
+        # without resolving the current timezone once per value.
+        return (
+            isinstance(field, serializers.DateTimeField)
+            and settings.USE_TZ
+            and not hasattr(field, "timezone")
+            and getattr(field, "format", api_settings.DATETIME_FORMAT).lower()
+            == ISO_8601
+        )
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def __call__(self, rows):
+        current_timezone = timezone.get_current_timezone()
+        items = []
+        for item in rows:
+            for column, name in self.renames:
+                item[name] = item.pop(column)
+            for name in self.datetimes:
+                value = item[name]
+                if value is not None:
+                    value = value.astimezone(current_timezone).isoformat()
+                    if value.endswith("+00:00"):
+                        value = value[:-6] + "Z"
+                    item[name] = value
+            for name, convert in self.converters:
+                value = item[name]
+                if value is not None:
+                    item[name] = convert(value)
+            items.append(item)
+        return items
+
+
+@cache
+def row_mapper(serializer_class):
+    return RowMapper(serializer_class)
+
+
+class SeatField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
+        seats = self.context.get("seats")
+        if seats is None:
+            return super().to_internal_value(data)
+        try:
+            return seats[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class BookingListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        self.item_errors = []
+        if isinstance(data, list):
+            seat_ids = set()
+            for item in data:
+                try:
+                    seat_ids.add(int(item["seat"]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            seats = Seat.objects.in_bulk(seat_ids)
+            self._context = {**self._context, "seats": seats}
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        try:
+            validated = super().run_child_validation(data)
+        except ValidationError as exc:
+            self.item_errors.append(exc.detail)
+            return None
+        self.item_errors.append({})
+        return validated
+
+
+def validate_booking_interval(start_time, end_time):
+    server_timezone = pytz.timezone(settings.TIME_ZONE)
+
+    current_time = server_timezone.localize(datetime.now())
+
+    if start_time < current_time:
+        raise serializers.ValidationError("Cannot book in the past.")
+    if (end_time - start_time).total_seconds() > MAX_BOOKING_DURATION:
+        raise serializers.ValidationError("Booking duration exceeds limit.")
+
+    if (end_time - start_time).total_seconds() < MIN_BOOKING_DURATION:
+        raise serializers.ValidationError("Can be booked for a minimum of 1 hour.")
+
+
+class OfficeLocalTimeMixin:
+    local_time_fields = ("start_time", "end_time")
+
+    def to_internal_value(self, data):
+        validated = super().to_internal_value(data)
+        zone = None
+        for name in self.local_time_fields:
+            value = parse_datetime(str(data.get(name)))
+            if value is not None and timezone.is_naive(value):
+                zone = zone or office_config.for_room(validated["seat"].room_id).zone
+                validated[name] = timezone.make_aware(value, zone)
+        return validated
+
+
+class BookingSerializer(
+    OfficeLocalTimeMixin, ExpandableSerializerMixin, serializers.ModelSerializer
+):
+    expandable_fields = {"seat": SeatSerializer}
+
+    seat = SeatField(queryset=Seat.objects.all())
+
     class Meta:
         model = Booking
         exclude = ["user"]
+        read_only_fields = ["series"]
+        list_serializer_class = BookingListSerializer
 
     def validate(self, data):
-        server_timezone = pytz.timezone(settings.TIME_ZONE)
+        validate_booking_interval(data["start_time"], data["end_time"])
+        return data
 
-        current_time = server_timezone.localize(datetime.now())
-        start_time = data["start_time"]
-        end_time = data["end_time"]
 
-        if start_time < current_time:
-            raise serializers.ValidationError("Cannot book in the past.")
-        if (end_time - start_time).total_seconds() > MAX_BOOKING_DURATION:
-            raise serializers.ValidationError("Booking duration exceeds limit.")
+class BookingSeriesSerializer(OfficeLocalTimeMixin, serializers.ModelSerializer):
+    class Meta:
+        model = BookingSeries
+        exclude = ["user"]
+        read_only_fields = ["is_active", "created_at"]
 
-        if (end_time - start_time).total_seconds() < MIN_BOOKING_DURATION:
-            raise serializers.ValidationError("Can be booked for a minimum of 1 hour.")
+    def validate(self, data):
+        validate_booking_interval(data["start_time"], data["end_time"])
+
+        zone = office_config.for_room(data["seat"].room_id).zone
+        if data["until"] < timezone.localtime(data["start_time"], zone).date():
+            raise serializers.ValidationError("until must not precede start_time.")
+
+        series = BookingSeries(**data)
+        if data["end_time"] - data["start_time"] > series.step():
+            raise serializers.ValidationError(
+                "A booking must not last longer than the series step, "
+                "or its occurrences would overlap."
+            )
 
+        occurrences = sum(1 for _ in series.occurrences())
+        if occurrences > MAX_SERIES_OCCURRENCES:
+            raise serializers.ValidationError(
+                f"A series cannot have more than {MAX_SERIES_OCCURRENCES} occurrences."
+            )
         return data
 
 
 class BookingHistorySerializer(serializers.Serializer):
     date = serializers.DateField()
-    seat_id = serializers.IntegerField()
-    user_id = serializers.IntegerField()
+    end_date = serializers.DateField(required=False)
+    seat_id = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1
+    )
+    user_id = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1
+    )
 
     def validate(self, data):
-        try:
-            datetime.strptime(str(data["date"]), "%Y-%m-%d").date()
-        except ValueError:
-            raise serializers.ValidationError("Invalid date format. Use YYYY-MM-DD.")
+        if data.get("end_date", data["date"]) < data["date"]:
+            raise serializers.ValidationError("end_date must not precede date.")
 
         return data
 
 
+class MyBookingsSerializer(serializers.Serializer):
+    UPCOMING = "upcoming"
+    PAST = "past"
+
+    to = serializers.DateTimeField(required=False)
+    status = serializers.ChoiceField(choices=[UPCOMING, PAST], required=False)
+    summary = serializers.BooleanField(default=False)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["from"] = serializers.DateTimeField(required=False)
+        return fields
+
+    def validate(self, data):
+        if "from" in data and "to" in data and data["from"] >= data["to"]:
+            raise serializers.ValidationError("from must be before to.")
+        return data
+
+
+def validate_not_past(date, zones):
+    if date < min(timezone.localdate(timezone=zone) for zone in zones):
+        raise serializers.ValidationError(
+            {"date": "Booking for past dates is not allowed."}
+        )
+
+
 class AvailableSeatsSerializer(serializers.Serializer):
     date = serializers.DateField()
     room_id = serializers.IntegerField()
 
     def validate_date(self, value):
-        server_timezone = pytz.timezone(settings.TIME_ZONE)
-        current_time = server_timezone.localize(datetime.now())
-
         try:
-            selected_date = datetime.strptime(str(value), "%Y-%m-%d").date()
+            datetime.strptime(str(value), "%Y-%m-%d").date()
         except ValueError:
             raise serializers.ValidationError("Invalid date format. Use YYYY-MM-DD.")
 
-        if selected_date < current_time.date():
-            raise serializers.ValidationError("Booking for past dates is not allowed.")
-
         return value
 
     def validate_room_id(self, value):
@@ -86,6 +328,98 @@ class AvailableSeatsSerializer(serializers.Serializer):
             raise serializers.ValidationError("room_id parameter is required.")
         return value
 
+    def zones(self, data):
+        if "zone" in self.context:
+            return [self.context["zone"]]
+        return [office_config.for_room(data["room_id"]).zone]
+
+    def validate(self, data):
+        validate_not_past(data["date"], self.zones(data))
+        return data
+
+
+class AvailableSeatsRangeSerializer(AvailableSeatsSerializer):
+    date = None
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    room_id = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1
+    )
+
+    def zones(self, data):
+        return [office_config.for_room(room_id).zone for room_id in data["room_id"]]
+
+    def validate(self, data):
+        validate_not_past(data["start_date"], self.zones(data))
+        days = (data["end_date"] - data["start_date"]).days + 1
+        if days < 1:
+            raise serializers.ValidationError("end_date must not precede start_date.")
+        if days > MAX_AVAILABILITY_RANGE_DAYS:
+            raise serializers.ValidationError(
+                f"Date range cannot exceed {MAX_AVAILABILITY_RANGE_DAYS} days."
+            )
+        return data
+
+
+class OfficeAvailabilitySerializer(AvailableSeatsSerializer):
+    room_id = None
+
+    def zones(self, data):
+        return [self.context.get("zone", office_config.DEFAULT_CONFIG.zone)]
+
+
+class OccupancySerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    office_id = serializers.IntegerField(required=False)
+    room_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if ("office_id" in data) == ("room_id" in data):
+            raise serializers.ValidationError(
+                "Exactly one of office_id and room_id is required."
+            )
+
+        days = (data["end_date"] - data["start_date"]).days + 1
+        if days < 1:
+            raise serializers.ValidationError("end_date must not precede start_date.")
+        if days > MAX_OCCUPANCY_RANGE_DAYS:
+            raise serializers.ValidationError(
+                f"Date range cannot exceed {MAX_OCCUPANCY_RANGE_DAYS} days."
+            )
+        return data
+
+
+class FindSeatSerializer(serializers.Serializer):
+    office_id = serializers.IntegerField(required=False)
+    room_id = serializers.IntegerField(required=False)
+    window_start = serializers.DateTimeField()
+    window_end = serializers.DateTimeField()
+    duration = serializers.DurationField()
+    strategy = serializers.ChoiceField(
+        choices=["first_fit", "best_fit"], default="first_fit"
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, data):
+        if ("office_id" in data) == ("room_id" in data):
+            raise serializers.ValidationError(
+                "Exactly one of office_id and room_id is required."
+            )
+
+        seconds = data["duration"].total_seconds()
+        if seconds < MIN_BOOKING_DURATION:
+            raise serializers.ValidationError("Can be booked for a minimum of 1 hour.")
+        if seconds > MAX_BOOKING_DURATION:
+            raise serializers.ValidationError("Booking duration exceeds limit.")
+
+        data["window_start"] = max(data["window_start"], timezone.now())
+        if data["window_end"] - data["window_start"] < data["duration"]:
+            raise serializers.ValidationError(
+                "The time window is shorter than the requested duration."
+            )
+        return data
+
 
 class AvailableSeatsResponseSerializer(serializers.Serializer):
     date = serializers.DateField()
@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import office_config
+from .availability_cache import booking_keys, invalidate_keys, invalidate_rooms
+from .models import Booking, BookingSeries, Office, Room, Seat
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_interval(sender, instance, **kwargs):
+    instance._stale_availability = []
+    if instance.pk is None:
+        return
+    previous = (
+        Booking.objects.all_with_deleted()
+        .filter(pk=instance.pk)
+        .values_list("seat__room_id", "start_time", "end_time")
+        .first()
+    )
+    if previous is not None:
+        instance._stale_availability = booking_keys(*previous)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_availability(sender, instance, **kwargs):
+    keys = getattr(instance, "_stale_availability", [])
+    keys += booking_keys(instance.seat.room_id, instance.start_time, instance.end_time)
+    invalidate_keys(keys)
+
+
+@receiver(post_save, sender=BookingSeries)
+def invalidate_series_availability(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_keys(
+            booking_keys(
+                instance.seat.room_id, instance.start_time, instance.last_end_time()
+            )
+        )
+
+
+@receiver(pre_save, sender=Seat)
+def remember_seat_room(sender, instance, **kwargs):
+    instance._stale_rooms = set()
+    if instance.pk is not None:
+        instance._stale_rooms.update(
+            Seat.objects.all_with_deleted()
+            .filter(pk=instance.pk)
+            .values_list("room_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def invalidate_seat_availability(sender, instance, **kwargs):
+    office_config.remember_seat(instance)
+    invalidate_rooms(getattr(instance, "_stale_rooms", set()) | {instance.room_id})
+
+
+@receiver(post_save, sender=Room)
+def invalidate_room_availability(sender, instance, created, **kwargs):
+    office_config.remember_room(instance)
+    if not created:
+        invalidate_rooms([instance.pk])
+
+
+@receiver(post_save, sender=Office)
+def invalidate_office_availability(sender, instance, created, **kwargs):
+    office_config.remember_office(instance)
+    if not created:
+        invalidate_rooms(
+            Room.objects.all_with_deleted()
+            .filter(office=instance)
+            .values_list("pk", flat=True)
+        )
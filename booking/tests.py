@@ -1,11 +1,32 @@
-from django.test import TestCase
+import json
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, router, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import AccessToken
-from .models import Office, Room, Seat, Booking
-from datetime import datetime, timedelta
+from order_proj import db_router
+from . import availability_cache, office_config
+from .availability import merge_intervals
+from .models import Office, Room, Seat, Booking, BookingSeries
+from .renderers import ORJSONRenderer
+from .schedule import WorkingHours, bookable_grid, day_grid, slot_labels
+from .serializers import (
+    BookingSerializer,
+    OfficeSerializer,
+    RoomSerializer,
+    SeatSerializer,
+    row_mapper,
+)
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -40,6 +61,26 @@ class BookingTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Booking.objects.count(), 1)
 
+    def test_create_conflicting_booking(self):
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        seat = Seat.objects.create(room=room, number=1)
+
+        start_time = timezone.now() + timedelta(days=1)
+        url = reverse("create-booking")
+        for offset in (0, 1):
+            data = {
+                "start_time": (start_time + timedelta(hours=offset)).isoformat(),
+                "end_time": (start_time + timedelta(hours=offset + 2)).isoformat(),
+                "seat": seat.pk,
+            }
+            response = self.client.post(
+                url, data, format="json", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.count(), 1)
+
     def test_list_my_bookings(self):
         office = Office.objects.create(name="Test Office", location="Test Location")
         room = Room.objects.create(office=office, name="Test Room")
@@ -55,7 +96,125 @@ class BookingTests(TestCase):
         response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {self.token}")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_list_my_bookings_keyset_pagination(self):
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        seats = [Seat.objects.create(room=room, number=number) for number in range(2)]
+        start_time = timezone.now().replace(microsecond=123456)
+        for offset in range(5):
+            for seat in seats:
+                Booking.objects.create(
+                    user=self.user,
+                    seat=seat,
+                    start_time=start_time + timedelta(hours=offset),
+                    end_time=start_time + timedelta(hours=offset + 1),
+                )
+
+        url = reverse("list-my-bookings") + "?page_size=3"
+        ids = []
+        while url:
+            # Only the first page loads the user; later pages reuse the snapshot.
+            with self.assertNumQueries(1 if ids else 2):
+                response = self.client.get(
+                    url, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [booking["id"] for booking in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(
+            ids,
+            list(
+                Booking.objects.order_by("start_time", "id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+        response = self.client.get(
+            reverse("list-my-bookings") + "?cursor=bogus",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_my_bookings_expand(self):
+        start_time = timezone.now() + timedelta(days=1)
+        for index in range(5):
+            office = Office.objects.create(name=f"Office {index}", location="Test")
+            room = Room.objects.create(office=office, name=f"Room {index}")
+            seat = Seat.objects.create(room=room, number=index)
+            Booking.objects.create(
+                user=self.user,
+                seat=seat,
+                start_time=start_time + timedelta(hours=index),
+                end_time=start_time + timedelta(hours=index + 1),
+            )
+
+        url = reverse("list-my-bookings")
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url,
+                {"expand": "seat.room.office"},
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                booking["seat"]["room"]["office"]["name"]
+                for booking in response.data["results"]
+            ],
+            [f"Office {index}" for index in range(5)],
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("seat-list"),
+                {"expand": "room.office"},
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+        self.assertEqual(
+            response.data["results"][0]["room"]["office"]["name"], "Office 0"
+        )
+
+    def test_list_my_bookings_filters(self):
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        seat = Seat.objects.create(room=room, number=1)
+        now = timezone.now()
+        for hours in (-48, -24, -1, 24, 48):
+            Booking.objects.create(
+                user=self.user,
+                seat=seat,
+                start_time=now + timedelta(hours=hours),
+                end_time=now + timedelta(hours=hours + 2),
+            )
+
+        url = reverse("list-my-bookings")
+        response = self.client.get(
+            url, {"status": "past"}, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertGreater(
+            response.data["results"][0]["start_time"],
+            response.data["results"][1]["start_time"],
+        )
+
+        response = self.client.get(
+            url,
+            {"status": "upcoming", "to": (now + timedelta(hours=30)).isoformat()},
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, {"summary": "true"}, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+        self.assertEqual(response.data, {"total": 5, "upcoming": 3, "past": 2})
 
     def test_booking_history(self):
         office = Office.objects.create(name="Test Office", location="Test Location")
@@ -73,3 +232,937 @@ class BookingTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
+
+    def test_booking_history_range(self):
+        admin = User.objects.create_superuser(username="admin", password="admin")
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        seats = [Seat.objects.create(room=room, number=number) for number in range(3)]
+        day = timezone.make_aware(datetime(2024, 5, 10))
+        for seat, hours in ((seats[0], 10), (seats[1], 34), (seats[2], 10)):
+            Booking.objects.create(
+                user=self.user,
+                seat=seat,
+                start_time=day + timedelta(hours=hours),
+                end_time=day + timedelta(hours=hours + 1),
+            )
+        Booking.objects.create(
+            user=self.user,
+            seat=seats[0],
+            start_time=day - timedelta(hours=2),
+            end_time=day,
+        )
+
+        url = reverse("booking-history")
+        params = {"user_id": self.user.pk, "seat_id": [seats[0].pk, seats[1].pk]}
+        token = AccessToken.for_user(admin)
+        response = self.client.get(
+            url,
+            {**params, "date": "2024-05-10"},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get(
+            url,
+            {**params, "date": "2024-05-10", "end_date": "2024-05-11"},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_booking_history_includes_cancelled_bookings(self):
+        admin = User.objects.create_superuser(username="admin", password="admin")
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        seat = Seat.objects.create(room=room, number=1)
+        day = timezone.make_aware(datetime(2024, 5, 10))
+        for hours, is_active in ((10, True), (12, False)):
+            Booking.objects.create(
+                user=self.user,
+                seat=seat,
+                start_time=day + timedelta(hours=hours),
+                end_time=day + timedelta(hours=hours + 1),
+                is_active=is_active,
+            )
+
+        response = self.client.get(
+            reverse("booking-history"),
+            {"user_id": self.user.pk, "seat_id": seat.pk, "date": "2024-05-10"},
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(admin)}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [booking["is_active"] for booking in response.data["results"]],
+            [True, False],
+        )
+
+
+class AvailableSeatsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.token = AccessToken.for_user(self.user)
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        self.room = Room.objects.create(office=office, name="Test Room")
+        self.seat = Seat.objects.create(room=self.room, number=1)
+        self.free_seat = Seat.objects.create(room=self.room, number=2)
+        self.date = (timezone.localtime() + timedelta(days=2)).date()
+        cache.clear()
+        availability_cache.reset_stats()
+
+    def book(self, seat, hour, hours, is_active=True):
+        start_time = timezone.make_aware(
+            datetime.combine(self.date, datetime.min.time())
+        ).replace(hour=hour)
+        return Booking.objects.create(
+            user=self.user,
+            seat=seat,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=hours),
+            is_active=is_active,
+        )
+
+    def test_booked_slots_are_excluded(self):
+        booking = self.book(
+            self.seat, settings.START_OF_WORK_HOUR, settings.BOOKING_DURATION
+        )
+        self.book(self.seat, settings.END_OF_WORK_HOUR, 1, is_active=False)
+
+        available = Seat.get_available_seats(self.date, self.room.id)
+
+        booked = (
+            booking.start_time.strftime("%H:%M"),
+            booking.end_time.strftime("%H:%M"),
+        )
+        self.assertEqual(set(available), {self.seat.id, self.free_seat.id})
+        self.assertNotIn(booked[0], [start for start, _ in available[self.seat.id]])
+        self.assertEqual(
+            len(available[self.free_seat.id]), len(available[self.seat.id]) + 1
+        )
+
+    def test_cached_availability_is_invalidated(self):
+        available = availability_cache.get_available_seats(self.date, self.room.id)
+        self.assertEqual(
+            availability_cache.get_available_seats(self.date, self.room.id), available
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(
+                self.seat, settings.START_OF_WORK_HOUR, settings.BOOKING_DURATION
+            )
+        booked = availability_cache.get_available_seats(self.date, self.room.id)
+        self.assertEqual(len(booked[self.seat.id]), len(available[self.seat.id]) - 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertEqual(
+            availability_cache.get_available_seats(self.date, self.room.id), available
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.free_seat.delete()
+        self.assertEqual(
+            availability_cache.get_available_seats(self.date, self.room.id),
+            Seat.get_available_seats(self.date, self.room.id),
+        )
+        self.assertEqual(
+            availability_cache.get_stats(),
+            {"hits": 1, "misses": 4, "hit_ratio": 0.2},
+        )
+
+    def test_available_seats_endpoint(self):
+        url = reverse("available-seats")
+        response = self.client.get(
+            url,
+            {"date": self.date.isoformat(), "room_id": self.room.id},
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["time_by_seat"],
+            Seat.get_available_seats(self.date, self.room.id),
+        )
+
+    def test_available_seats_range_endpoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other_room = Room.objects.create(office=self.room.office, name="Other Room")
+            Seat.objects.create(room=other_room, number=1)
+        self.book(self.seat, settings.START_OF_WORK_HOUR, 40)
+        end_date = self.date + timedelta(days=2)
+
+        url = reverse("available-seats-range")
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                url,
+                {
+                    "start_date": self.date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                    "room_id": [self.room.id, other_room.id],
+                },
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+            days = json.loads(b"".join(response.streaming_content))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = []
+        for offset in range(3):
+            date = self.date + timedelta(days=offset)
+            time_by_seat = {}
+            for room in (self.room, other_room):
+                for seat_id, slots in Seat.get_available_seats(date, room.id).items():
+                    time_by_seat[str(seat_id)] = [list(slot) for slot in slots]
+            expected.append({"date": date.isoformat(), "time_by_seat": time_by_seat})
+        self.assertEqual(days, expected)
+        self.assertEqual(days[1]["time_by_seat"][str(self.seat.id)], [])
+
+    def test_office_availability(self):
+        other_room = Room.objects.create(office=self.room.office, name="Other Room")
+        for number in range(3):
+            Seat.objects.create(room=other_room, number=number)
+        booking = self.book(
+            self.seat, settings.START_OF_WORK_HOUR, settings.BOOKING_DURATION
+        )
+
+        url = reverse("office-availability", args=[self.room.office_id])
+        with self.assertNumQueries(5):
+            response = self.client.get(
+                url,
+                {"date": self.date.isoformat()},
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rooms = {room["id"]: room for room in response.data["rooms"]}
+        self.assertEqual(
+            rooms[self.room.id]["time_by_seat"],
+            Seat.get_available_seats(self.date, self.room.id),
+        )
+        self.assertEqual(rooms[other_room.id]["seats"], 3)
+        self.assertEqual(rooms[self.room.id]["free_seats"], 2)
+        first_slot = rooms[self.room.id]["free_seats_by_slot"][0]
+        self.assertEqual(first_slot["start"], booking.start_time.strftime("%H:%M"))
+        self.assertEqual(first_slot["free_seats"], 1)
+        self.assertEqual(rooms[other_room.id]["free_seats_by_slot"][0]["free_seats"], 3)
+
+    def test_office_time_zone_and_hours(self):
+        zone = ZoneInfo("Asia/Tokyo")
+        with self.captureOnCommitCallbacks(execute=True):
+            office = Office.objects.create(
+                name="Tokyo",
+                location="Tokyo",
+                time_zone="Asia/Tokyo",
+                opens_at=time(8, 30),
+                closes_at=time(12, 30),
+            )
+            room = Room.objects.create(office=office, name="Tokyo Room")
+            seat = Seat.objects.create(room=room, number=1)
+        date = timezone.localdate(timezone=zone) + timedelta(days=2)
+
+        with self.assertNumQueries(2):
+            available = Seat.get_available_seats(date, room.id)
+        self.assertEqual(available[seat.id][0][0], "08:30")
+        self.assertLessEqual(available[seat.id][-1][1], "12:30")
+
+        url = reverse("create-booking")
+        response = self.client.post(
+            url,
+            {
+                "seat": seat.id,
+                "start_time": f"{date.isoformat()}T08:30:00",
+                "end_time": f"{date.isoformat()}T10:30:00",
+            },
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Booking.objects.get(seat=seat).start_time,
+            datetime.combine(date, time(8, 30), tzinfo=zone),
+        )
+        self.assertNotIn(
+            ("08:30", "09:30"), Seat.get_available_seats(date, room.id)[seat.id]
+        )
+
+    def test_rolled_back_office_change_is_not_cached(self):
+        self.assertEqual(
+            office_config.for_room(self.room.id).tz_name, settings.TIME_ZONE
+        )
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                office = self.room.office
+                office.time_zone = "Asia/Tokyo"
+                office.save()
+                raise RuntimeError
+
+        self.assertEqual(
+            office_config.for_room(self.room.id).tz_name, settings.TIME_ZONE
+        )
+
+    def test_occupancy_report(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.book(self.seat, 0, 24)
+        self.book(
+            self.free_seat, settings.START_OF_WORK_HOUR, settings.BOOKING_DURATION
+        )
+        slots = len(day_grid(self.date).slots)
+
+        url = reverse("occupancy")
+        response = self.client.get(
+            url,
+            {
+                "start_date": self.date.isoformat(),
+                "end_date": (self.date + timedelta(days=1)).isoformat(),
+                "room_id": self.room.id,
+            },
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["slots"], slots * 2)
+        self.assertEqual(response.data["by_seat"][self.seat.id], 0.5)
+        self.assertEqual(response.data["by_seat"][self.free_seat.id], 1 / slots / 2)
+        self.assertEqual(
+            response.data["by_room"][self.room.id], (slots + 1) / (slots * 4)
+        )
+        first_hour = day_grid(self.date).labels[0][0]
+        self.assertEqual(response.data["by_hour"][first_hour], 0.5)
+
+
+class CreateBookingsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.token = AccessToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            office = Office.objects.create(name="Test Office", location="Test Location")
+            room = Room.objects.create(office=office, name="Test Room")
+            self.seat = Seat.objects.create(room=room, number=1)
+            self.other_seat = Seat.objects.create(room=room, number=2)
+        self.start_time = timezone.now() + timedelta(days=1)
+
+    def item(self, seat, offset, hours=2):
+        start_time = self.start_time + timedelta(hours=offset)
+        return {
+            "seat": seat.pk,
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=hours)).isoformat(),
+        }
+
+    def test_create_bookings(self):
+        Booking.objects.create(
+            user=self.user,
+            seat=self.other_seat,
+            start_time=self.start_time + timedelta(hours=10),
+            end_time=self.start_time + timedelta(hours=11),
+        )
+        data = [
+            self.item(self.seat, 0),
+            self.item(self.seat, 1),
+            self.item(self.other_seat, 0),
+            self.item(self.other_seat, 10),
+            self.item(self.seat, 0, hours=0),
+        ]
+
+        url = reverse("create-bookings")
+        response = self.client.post(
+            url, data, format="json", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            [201, 400, 201, 400, 400],
+        )
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_create_bookings_query_count(self):
+        data = [self.item(self.seat, offset * 2) for offset in range(20)]
+
+        url = reverse("create-bookings")
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                url, data, format="json", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.count(), 20)
+
+    def test_bulk_validation_leaves_caller_context_untouched(self):
+        context = {}
+        serializer = BookingSerializer(
+            data=[self.item(self.seat, 0)], many=True, context=context
+        )
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(context, {})
+
+
+class BookingSeriesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.token = AccessToken.for_user(self.user)
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        self.seat = Seat.objects.create(room=room, number=1)
+        self.start_time = timezone.localtime() + timedelta(days=1)
+
+    def series(self, **overrides):
+        data = {
+            "seat": self.seat.pk,
+            "start_time": self.start_time.isoformat(),
+            "end_time": (self.start_time + timedelta(hours=2)).isoformat(),
+            "frequency": BookingSeries.WEEKLY,
+            "until": (self.start_time + timedelta(weeks=3)).date().isoformat(),
+        }
+        data.update(overrides)
+        return data
+
+    def test_create_booking_series(self):
+        url = reverse("create-booking-series")
+        response = self.client.post(
+            url, self.series(), format="json", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["bookings"], 4)
+        start_times = list(
+            Booking.objects.filter(series=response.data["id"])
+            .order_by("start_time")
+            .values_list("start_time", flat=True)
+        )
+        self.assertEqual(
+            [later - earlier for earlier, later in zip(start_times, start_times[1:])],
+            [timedelta(weeks=1)] * 3,
+        )
+
+    def test_conflicting_series_books_nothing(self):
+        Booking.objects.create(
+            user=self.user,
+            seat=self.seat,
+            start_time=self.start_time + timedelta(weeks=2, hours=1),
+            end_time=self.start_time + timedelta(weeks=2, hours=3),
+        )
+
+        url = reverse("create-booking-series")
+        response = self.client.post(
+            url, self.series(), format="json", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data["conflicts"]), 1)
+        self.assertFalse(BookingSeries.objects.exists())
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_interval_must_be_positive(self):
+        url = reverse("create-booking-series")
+        for interval in (0, -1):
+            with self.subTest(interval=interval):
+                response = self.client.post(
+                    url,
+                    self.series(interval=interval),
+                    format="json",
+                    HTTP_AUTHORIZATION=f"Bearer {self.token}",
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("interval", response.data)
+        self.assertFalse(BookingSeries.objects.exists())
+
+    def test_occurrences_must_not_overlap(self):
+        url = reverse("create-booking-series")
+        response = self.client.post(
+            url,
+            self.series(
+                frequency=BookingSeries.DAILY,
+                end_time=(self.start_time + timedelta(days=2)).isoformat(),
+                until=(self.start_time + timedelta(days=5)).date().isoformat(),
+            ),
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_cancel_booking_series(self):
+        self.client.post(
+            reverse("create-booking-series"),
+            self.series(frequency=BookingSeries.DAILY),
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        series = BookingSeries.objects.get()
+
+        url = reverse("cancel-booking-series")
+        response = self.client.post(
+            url,
+            {"series_id": series.pk},
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(Booking.objects.all_with_deleted().count(), 22)
+
+    def test_cancel_booking_series_keeps_past_occurrences(self):
+        series = BookingSeries.objects.create(
+            user=self.user,
+            seat=self.seat,
+            start_time=self.start_time - timedelta(days=2),
+            end_time=self.start_time - timedelta(days=2) + timedelta(hours=1),
+            frequency=BookingSeries.DAILY,
+            until=(self.start_time + timedelta(days=1)).date(),
+        )
+        for start_time, end_time in series.occurrences():
+            Booking.objects.create(
+                user=self.user,
+                seat=self.seat,
+                series=series,
+                start_time=start_time,
+                end_time=end_time,
+            )
+
+        response = self.client.post(
+            reverse("cancel-booking-series"),
+            {"series_id": series.pk},
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        remaining = Booking.objects.filter(series=series)
+        self.assertEqual(remaining.count(), 2)
+        self.assertTrue(all(b.start_time < timezone.now() for b in remaining))
+        self.assertEqual(Booking.objects.all_with_deleted().count(), 4)
+        self.assertFalse(BookingSeries.objects.exists())
+
+
+class RowMapperTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        office = Office.objects.create(name="Офис\u2028№1", location="Test")
+        room = Room.objects.create(office=office, name="Test Room")
+        seat = Seat.objects.create(room=room, number=1)
+        start_time = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        series = BookingSeries.objects.create(
+            user=user,
+            seat=seat,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=1),
+            frequency=BookingSeries.DAILY,
+            until=start_time.date(),
+        )
+        Booking.objects.create(
+            user=user,
+            seat=seat,
+            series=series,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=1),
+        )
+        Booking.objects.create(
+            user=user,
+            seat=seat,
+            start_time=start_time + timedelta(hours=2, microseconds=1500),
+            end_time=start_time + timedelta(hours=3),
+        )
+
+    def test_output_matches_serializer(self):
+        for serializer_class in (
+            OfficeSerializer,
+            RoomSerializer,
+            SeatSerializer,
+            BookingSerializer,
+        ):
+            for current_timezone in ("Europe/Minsk", "UTC"):
+                with timezone.override(current_timezone):
+                    self.assertRendersLikeSerializer(serializer_class)
+
+    def assertRendersLikeSerializer(self, serializer_class):
+        queryset = serializer_class.Meta.model.objects.order_by("id")
+        rows = row_mapper(serializer_class)
+        expected = JSONRenderer().render(
+            [
+                dict(sorted(item.items()))
+                for item in serializer_class(queryset, many=True).data
+            ]
+        )
+        actual = ORJSONRenderer().render(
+            [dict(sorted(item.items())) for item in rows(rows.values(queryset))]
+        )
+        self.assertEqual(actual, expected)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        token = AccessToken.for_user(self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.headers = {"Authorization": f"Bearer {token}"}
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        self.room = Room.objects.create(office=office, name="Test Room")
+        self.seat = Seat.objects.create(room=self.room, number=1)
+        Seat.objects.create(room=self.room, number=2)
+        start_time = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        for hours in range(3):
+            Booking.objects.create(
+                user=self.user,
+                seat=self.seat,
+                start_time=start_time + timedelta(hours=hours),
+                end_time=start_time + timedelta(hours=hours, minutes=30),
+            )
+        cache.clear()
+
+    async def test_responses_match_sync_views(self):
+        date = (timezone.localdate() + timedelta(days=2)).isoformat()
+        cases = [
+            ("available-seats", {}, {"date": date, "room_id": self.room.pk}),
+            ("available-seats", {}, {"date": "2000-01-01", "room_id": self.room.pk}),
+            ("available-seats", {}, {"date": date, "room_id": 999999}),
+            ("available-seats", {}, {"date": date, "room_id": -1}),
+            ("list-my-bookings", {}, {"page_size": 2}),
+            ("list-my-bookings", {}, {"summary": "true"}),
+            ("list-my-bookings", {}, {"expand": "seat.room"}),
+            ("seat-list", {}, {"page_size": 1}),
+            ("seat-detail", {"pk": self.seat.pk}, {"expand": "room"}),
+            ("room-detail", {"pk": 0}, {}),
+        ]
+        for name, kwargs, params in cases:
+            with self.subTest(name=name, params=params):
+                expected = await sync_to_async(self.client.get)(
+                    reverse(name, kwargs=kwargs), params, **self.auth
+                )
+                response = await self.async_client.get(
+                    reverse(f"{name}-async", kwargs=kwargs),
+                    params,
+                    headers=self.headers,
+                )
+                self.assertEqual(response.status_code, expected.status_code)
+                expected_json = json.loads(expected.content)
+                if "next" in expected_json:
+                    # Only the path differs between the two next links.
+                    self.assertEqual(
+                        bool(response.json()["next"]), bool(expected_json["next"])
+                    )
+                    expected_json.pop("next")
+                    self.assertEqual(
+                        response.json()["results"], expected_json["results"]
+                    )
+                else:
+                    self.assertEqual(response.json(), expected_json)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse("office-list-async"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.get(
+            reverse("office-list-async"), headers={"Authorization": "Bearer invalid"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+        response = await self.async_client.post(
+            reverse("office-list-async"), headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class FindSeatTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.token = AccessToken.for_user(self.user)
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        self.room = Room.objects.create(office=office, name="Test Room")
+        self.short_gap, self.long_gap, self.empty = [
+            Seat.objects.create(room=self.room, number=number) for number in range(3)
+        ]
+        self.window_start = timezone.make_aware(
+            datetime.combine(
+                timezone.localdate() + timedelta(days=1), datetime.min.time()
+            )
+        ).replace(hour=9)
+        self.book(self.short_gap, 1, 4)
+        self.book(self.long_gap, 0, 2)
+
+    def book(self, seat, start, end):
+        Booking.objects.create(
+            user=self.user,
+            seat=seat,
+            start_time=self.window_start + timedelta(hours=start),
+            end_time=self.window_start + timedelta(hours=end),
+        )
+
+    def params(self, strategy):
+        return {
+            "room_id": self.room.id,
+            "window_start": self.window_start.isoformat(),
+            "window_end": (self.window_start + timedelta(hours=4)).isoformat(),
+            "duration": "3600",
+            "strategy": strategy,
+        }
+
+    def test_first_fit_and_best_fit(self):
+        url = reverse("find-seat")
+        orders = {}
+        for strategy in ("first_fit", "best_fit"):
+            response = self.client.get(
+                url,
+                self.params(strategy),
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            orders[strategy] = [
+                (result["seat"], result["start_time"])
+                for result in response.data["results"]
+            ]
+
+        self.assertEqual(
+            orders["first_fit"],
+            [
+                (self.short_gap.id, self.window_start),
+                (self.empty.id, self.window_start),
+                (self.long_gap.id, self.window_start + timedelta(hours=2)),
+            ],
+        )
+        self.assertEqual(
+            [seat for seat, _ in orders["best_fit"]],
+            [self.short_gap.id, self.long_gap.id, self.empty.id],
+        )
+
+    def test_book_best_candidate(self):
+        url = reverse("find-seat")
+        response = self.client.post(
+            url,
+            self.params("best_fit"),
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["seat"], self.short_gap.id)
+        self.assertEqual(Booking.objects.filter(seat=self.short_gap).count(), 2)
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.office = Office.objects.create(name="Test Office", location="Test")
+        self.other_office = Office.objects.create(name="Other Office", location="Test")
+        start_time = timezone.now() + timedelta(days=1)
+        for office in (self.office, self.other_office):
+            for room_index in range(2):
+                room = Room.objects.create(office=office, name=f"Room {room_index}")
+                for number in range(3):
+                    seat = Seat.objects.create(room=room, number=number)
+                    Booking.objects.create(
+                        user=self.user,
+                        seat=seat,
+                        start_time=start_time,
+                        end_time=start_time + timedelta(hours=1),
+                    )
+
+    def assertCascaded(self):
+        self.office.refresh_from_db()
+        self.assertFalse(self.office.is_active)
+        self.assertFalse(Room.objects.filter(office=self.office).exists())
+        self.assertFalse(Seat.objects.filter(room__office=self.office).exists())
+        self.assertFalse(
+            Booking.objects.filter(seat__room__office=self.office).exists()
+        )
+        self.assertEqual(
+            Booking.objects.all_with_deleted()
+            .filter(seat__room__office=self.office)
+            .count(),
+            6,
+        )
+        self.assertEqual(
+            Booking.objects.filter(seat__room__office=self.other_office).count(),
+            6,
+        )
+
+    def test_delete_cascades_with_one_update_per_model(self):
+        with self.assertNumQueries(9):
+            self.office.delete()
+
+        self.assertCascaded()
+
+    def test_delete_in_chunks(self):
+        self.office.delete(chunk_size=4)
+
+        self.assertCascaded()
+
+    def test_deleted_rows_are_hidden_from_viewsets(self):
+        client = APIClient()
+        token = AccessToken.for_user(self.user)
+        self.office.delete()
+
+        response = client.get(
+            reverse("office-list"), HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [office["id"] for office in response.data["results"]],
+            [self.other_office.id],
+        )
+
+
+class SlotGridTests(SimpleTestCase):
+    def setUp(self):
+        start = timezone.make_aware(datetime(2024, 5, 11, 9))
+        self.hour = timedelta(hours=1)
+        self.start = start
+        self.grid = day_grid(
+            start.date(), WorkingHours(opening=9 * 60, closing=15 * 60, slot_minutes=60)
+        )
+
+    def test_free_mask(self):
+        merged = merge_intervals(
+            (start.timestamp(), end.timestamp())
+            for start, end in [
+                (self.start - self.hour, self.start + self.hour / 2),
+                (self.start + self.hour * 3, self.start + self.hour * 4),
+                (self.start + self.hour * 3.5, self.start + self.hour * 5),
+            ]
+        )
+
+        mask = self.grid.free(merged)
+
+        self.assertEqual(mask, 0b100110)
+        self.assertEqual(
+            self.grid.render(mask),
+            [("10:00", "11:00"), ("11:00", "12:00"), ("14:00", "15:00")],
+        )
+        self.assertEqual(
+            self.grid.count_free([mask, self.grid.full]), [1, 2, 2, 1, 1, 2]
+        )
+
+    def test_schedule_honours_minutes(self):
+        hours = WorkingHours(
+            opening=8 * 60 + 30, closing=17 * 60 + 45, slot_minutes=120
+        )
+
+        self.assertEqual(
+            slot_labels(hours),
+            (
+                ("08:30", "10:30"),
+                ("10:30", "12:30"),
+                ("12:30", "14:30"),
+                ("14:30", "16:30"),
+            ),
+        )
+        slots = day_grid(datetime(2024, 5, 11).date(), hours).slots
+        self.assertEqual(slots[0][0], self.start - self.hour / 2)
+        self.assertEqual(slots[-1][1] - slots[0][0], timedelta(hours=8))
+
+    def test_bookable_grid_drops_started_slots(self):
+        hours = WorkingHours(opening=9 * 60, closing=18 * 60, slot_minutes=60)
+        now = self.start + self.hour * 2.5
+        grid = bookable_grid(now.date(), hours, now=now)
+
+        self.assertEqual(grid.labels[0][0], "12:00")
+        self.assertEqual(grid.starts[0], (self.start + self.hour * 3).timestamp())
+        self.assertIs(
+            bookable_grid(now.date(), hours, now=now - timedelta(days=1)),
+            bookable_grid(now.date(), hours, now=now - timedelta(days=2)),
+        )
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.token = AccessToken.for_user(self.user)
+        cache.clear()
+
+    def test_reads_go_to_replica_only_when_allowed(self):
+        # TestCase wraps every test in a transaction, so leave it for a moment.
+        with mock.patch.object(connection, "in_atomic_block", False):
+            self.assertEqual(router.db_for_read(Booking), "default")
+            with db_router.replica_reads(self.user):
+                self.assertEqual(router.db_for_read(Booking), "replica_0")
+                self.assertEqual(router.db_for_write(Booking), "default")
+                with db_router.primary():
+                    self.assertEqual(router.db_for_read(Booking), "default")
+
+        with db_router.replica_reads(self.user):
+            self.assertEqual(router.db_for_read(Booking), "default")
+
+    def test_streamed_range_reads_from_replica(self):
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        Seat.objects.create(room=room, number=1)
+        date = timezone.localdate() + timedelta(days=1)
+        aliases = []
+
+        def db_for_read(router, model, **hints):
+            # Record the alias chosen for the request; the test database has
+            # no replica, so the query itself still runs on the primary.
+            aliases.append(db_router._replica.get())
+            return "default"
+
+        with mock.patch.object(
+            db_router.ReplicaRouter, "db_for_read", autospec=True
+        ) as patched:
+            patched.side_effect = db_for_read
+            response = self.client.get(
+                reverse("available-seats-range"),
+                {
+                    "room_id": room.pk,
+                    "start_date": date.isoformat(),
+                    "end_date": (date + timedelta(days=1)).isoformat(),
+                },
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+            aliases.clear()
+            content = b"".join(response.streaming_content)
+
+        self.assertEqual(len(json.loads(content)), 2)
+        self.assertTrue(aliases)
+        self.assertEqual(set(aliases), {"replica_0"})
+
+    def test_user_reads_stick_to_primary_after_a_write(self):
+        self.assertEqual(db_router.choose_replica(self.user), "replica_0")
+
+        office = Office.objects.create(name="Test Office", location="Test Location")
+        room = Room.objects.create(office=office, name="Test Room")
+        seat = Seat.objects.create(room=room, number=1)
+        start_time = timezone.now() + timedelta(days=1)
+        response = self.client.post(
+            reverse("create-booking"),
+            {
+                "start_time": start_time.isoformat(),
+                "end_time": (start_time + timedelta(hours=1)).isoformat(),
+                "seat": seat.pk,
+            },
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertIsNone(db_router.choose_replica(self.user))
+        other = User.objects.create_user(username="other", password="testpassword")
+        self.assertEqual(db_router.choose_replica(other), "replica_0")
@@ -5,15 +5,23 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
     SpectacularRedocView,
 )
+from . import async_views
 from .views import (
     OfficeViewSet,
     RoomViewSet,
     SeatViewSet,
     create_booking,
+    create_bookings,
     list_my_bookings,
     booking_history,
     available_seats,
+    available_seats_range,
+    available_seats_cache_stats,
     cancel_booking,
+    create_booking_series,
+    cancel_booking_series,
+    find_seat,
+    occupancy_report,
 )
 
 router = SimpleRouter(trailing_slash=False)
@@ -24,10 +32,53 @@ router.register("seats", SeatViewSet, basename="seat")
 urlpatterns = [
     path("api/", include(router.urls)),
     path("api/create-booking/", create_booking, name="create-booking"),
+    path("api/create-bookings/", create_bookings, name="create-bookings"),
+    path("api/find-seat/", find_seat, name="find-seat"),
     path("api/cancel-booking/", cancel_booking, name="cancel-booking"),
+    path(
+        "api/create-booking-series/",
+        create_booking_series,
+        name="create-booking-series",
+    ),
+    path(
+        "api/cancel-booking-series/",
+        cancel_booking_series,
+        name="cancel-booking-series",
+    ),
     path("api/list-my-bookings/", list_my_bookings, name="list-my-bookings"),
     path("api/booking-history/", booking_history, name="booking-history"),
     path("api/available-seats/", available_seats, name="available-seats"),
+    path(
+        "api/available-seats/range/",
+        available_seats_range,
+        name="available-seats-range",
+    ),
+    path(
+        "api/available-seats/cache-stats/",
+        available_seats_cache_stats,
+        name="available-seats-cache-stats",
+    ),
+    path("api/occupancy/", occupancy_report, name="occupancy"),
+    path(
+        "api/async/available-seats/",
+        async_views.available_seats,
+        name="available-seats-async",
+    ),
+    path(
+        "api/async/list-my-bookings/",
+        async_views.list_my_bookings,
+        name="list-my-bookings-async",
+    ),
+    path("api/async/offices", async_views.office_list, name="office-list-async"),
+    path(
+        "api/async/offices/<int:pk>",
+        async_views.office_detail,
+        name="office-detail-async",
+    ),
+    path("api/async/rooms", async_views.room_list, name="room-list-async"),
+    path("api/async/rooms/<int:pk>", async_views.room_detail, name="room-detail-async"),
+    path("api/async/seats", async_views.seat_list, name="seat-list-async"),
+    path("api/async/seats/<int:pk>", async_views.seat_detail, name="seat-detail-async"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/schema/swagger-ui/",
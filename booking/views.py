@@ -1,18 +1,43 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework import viewsets, status, pagination
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, IsAdminUser
+from rest_framework import viewsets, status
 from rest_framework.response import Response
 
-from .models import Booking, Office, Room, Seat
+from authenticate.authentication import SnapshotJWTAuthentication
+from order_proj.db_router import keep_replica, read_only, replica_reads
+
+from . import availability_cache, occupancy, office_config
+from .availability import group_by_seat, merge_intervals, overlaps
+from .models import Booking, BookingSeries, Office, Room, Seat
+from .pagination import BookingPagination, KeysetPagination
 from .serializers import (
     OfficeSerializer,
     RoomSerializer,
     SeatSerializer,
     BookingSerializer,
+    BookingSeriesSerializer,
     BookingHistorySerializer,
+    MyBookingsSerializer,
     AvailableSeatsSerializer,
+    AvailableSeatsRangeSerializer,
+    OfficeAvailabilitySerializer,
+    OccupancySerializer,
+    FindSeatSerializer,
     AvailableSeatsResponseSerializer,
+    parse_expand,
+    row_mapper,
 )
 from drf_spectacular.utils import (
     extend_schema,
@@ -21,19 +46,50 @@ from drf_spectacular.utils import (
     OpenApiExample,
 )
 
-
-class CustomPagination(pagination.PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 100
+SEAT_ALREADY_BOOKED = "Seat is already booked for this time period."
 
 
 class BaseViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminUser]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
+    read_actions = ("list", "retrieve")
+
+    def get_expand(self):
+        if self.action not in ("list", "retrieve"):
+            return {}
+        return parse_expand(self.request.query_params.get("expand"))
+
+    def get_queryset(self):
+        return self.get_serializer_class().select_expanded(
+            super().get_queryset(), self.get_expand()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("expand", self.get_expand())
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        with replica_reads(request.user):
+            if self.get_expand():
+                return super().list(request, *args, **kwargs)
+
+            rows = row_mapper(self.get_serializer_class())
+            page = self.paginate_queryset(rows.values(self.get_queryset()))
+            return self.get_paginated_response(rows(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        with replica_reads(request.user):
+            return super().retrieve(request, *args, **kwargs)
+
+    def get_authenticators(self):
+        # Writes check the user row itself, not a possibly stale snapshot. The
+        # schema generator builds views without a request.
+        if self.request is not None and self.request.method in SAFE_METHODS:
+            return [SnapshotJWTAuthentication()]
+        return super().get_authenticators()
 
     def get_permissions(self):
-        if self.action == "list" or self.action == "retrieve":
+        if self.action in self.read_actions:
             permission_classes = [IsAuthenticated]
         else:
             permission_classes = [IsAdminUser]
@@ -58,6 +114,39 @@ class BaseViewSet(viewsets.ModelViewSet):
 class OfficeViewSet(BaseViewSet):
     queryset = Office.objects.all()
     serializer_class = OfficeSerializer
+    read_actions = ("list", "retrieve", "availability")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="date",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Date in YYYY-MM-DD format",
+            ),
+        ],
+        responses={200: OpenApiResponse(description="Free slots per room and seat.")},
+        description="Free slots and free seat counts for every room of an office.",
+    )
+    @action(detail=True, methods=["get"])
+    def availability(self, request, pk=None):
+        with replica_reads(request.user):
+            office = self.get_object()
+            config = office_config.from_office(office)
+            serializer = OfficeAvailabilitySerializer(
+                data=request.query_params, context={"zone": config.zone}
+            )
+
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            date = serializer.validated_data["date"]
+            response_data = {
+                "date": date,
+                "office_id": office.id,
+                "rooms": Seat.get_office_availability(date, office.id, config),
+            }
+        return Response(response_data, status=status.HTTP_200_OK)
 
 
 class RoomViewSet(BaseViewSet):
@@ -86,21 +175,187 @@ def create_booking(request):
 
     serializer = BookingSerializer(data=data, context={"request": request})
 
-    if serializer.is_valid():
-        seat = data.get("seat")
-
-        if Booking.objects.has_conflicting_bookings(
-            seat, data["start_time"], data["end_time"]
-        ):
-            return Response(
-                {"error": "Seat is already booked for this time period."},
-                status=status.HTTP_400_BAD_REQUEST,
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    seat = serializer.validated_data["seat"]
+    start_time = serializer.validated_data["start_time"]
+    end_time = serializer.validated_data["end_time"]
+
+    try:
+        with transaction.atomic():
+            Booking.objects.lock_seats([seat.pk])
+            if Booking.objects.has_conflicting_bookings(seat, start_time, end_time):
+                return Response(
+                    {"error": SEAT_ALREADY_BOOKED},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            serializer.save(user=user)
+    except IntegrityError:
+        return Response(
+            {"error": SEAT_ALREADY_BOOKED}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(
+    request=BookingSerializer(many=True),
+    responses={
+        201: OpenApiResponse(description="All bookings created."),
+        207: OpenApiResponse(description="Some bookings were rejected."),
+        400: OpenApiResponse(description="No booking was created."),
+    },
+    description="Create several bookings at once. Results are returned per item.",
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_bookings(request):
+    user = request.user
+    serializer = BookingSerializer(
+        data=request.data,
+        many=True,
+        max_length=settings.MAX_BATCH_BOOKINGS,
+        context={"request": request},
+    )
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    errors = list(serializer.item_errors)
+    candidates = [
+        (index, attrs)
+        for index, attrs in enumerate(serializer.validated_data)
+        if attrs is not None
+    ]
+    intervals = [
+        (attrs["seat"].pk, attrs["start_time"], attrs["end_time"])
+        for _, attrs in candidates
+    ]
+
+    created = {}
+    try:
+        with transaction.atomic():
+            Booking.objects.lock_seats({seat_id for seat_id, _, _ in intervals})
+            booked = {
+                seat_id: merge_intervals(seat_intervals)
+                for seat_id, seat_intervals in group_by_seat(
+                    Booking.objects.conflicting_intervals(intervals)
+                ).items()
+            }
+
+            accepted = defaultdict(list)
+            for (index, attrs), (seat_id, start_time, end_time) in zip(
+                candidates, intervals
+            ):
+                if (
+                    seat_id in booked
+                    and overlaps(booked[seat_id], start_time, end_time)
+                ) or any(
+                    start_time < other_end and end_time > other_start
+                    for other_start, other_end in accepted[seat_id]
+                ):
+                    errors[index] = {"error": SEAT_ALREADY_BOOKED}
+                    continue
+                accepted[seat_id].append((start_time, end_time))
+                created[index] = Booking(user=user, **attrs)
+
+            Booking.objects.bulk_create(created.values())
+            availability_cache.invalidate_bookings(created.values())
+    except IntegrityError:
+        return Response(
+            {"error": SEAT_ALREADY_BOOKED}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    results = []
+    for index, item_errors in enumerate(errors):
+        if index in created:
+            results.append(
+                {
+                    "status": status.HTTP_201_CREATED,
+                    "booking": BookingSerializer(created[index]).data,
+                }
+            )
+        else:
+            results.append(
+                {"status": status.HTTP_400_BAD_REQUEST, "errors": item_errors}
             )
 
-        serializer.save(user=user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    if len(created) == len(results):
+        response_status = status.HTTP_201_CREATED
+    elif created:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({"results": results}, status=response_status)
 
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@extend_schema(
+    parameters=[FindSeatSerializer],
+    request=FindSeatSerializer,
+    responses={
+        200: OpenApiResponse(description="Seats that are free for the duration."),
+        201: BookingSerializer,
+        400: OpenApiResponse(description="Bad request or no seat available."),
+    },
+    description=(
+        "Find seats in an office or room that are free for the given duration "
+        "inside a time window. POST books the best candidate."
+    ),
+)
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def find_seat(request):
+    data = request.query_params if request.method == "GET" else request.data
+    serializer = FindSeatSerializer(data=data)
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    if "office_id" in params:
+        seats = Seat.objects.filter(room__office=params["office_id"])
+    else:
+        seats = Seat.objects.filter(room=params["room_id"])
+    candidates = Booking.objects.find_free_seats(
+        seats,
+        params["window_start"],
+        params["window_end"],
+        params["duration"],
+        strategy=params["strategy"],
+        limit=params["limit"],
+    )
+
+    if request.method == "GET":
+        return Response({"results": candidates}, status=status.HTTP_200_OK)
+
+    for candidate in candidates:
+        booking_serializer = BookingSerializer(
+            data={
+                "seat": candidate["seat"],
+                "start_time": candidate["start_time"],
+                "end_time": candidate["end_time"],
+            },
+            context={"request": request},
+        )
+        if not booking_serializer.is_valid():
+            continue
+        try:
+            with transaction.atomic():
+                Booking.objects.lock_seats([candidate["seat"]])
+                if Booking.objects.has_conflicting_bookings(
+                    candidate["seat"], candidate["start_time"], candidate["end_time"]
+                ):
+                    continue
+                booking_serializer.save(user=request.user)
+        except IntegrityError:
+            continue
+        return Response(booking_serializer.data, status=status.HTTP_201_CREATED)
+
+    return Response(
+        {"error": "No seat is available for this time period."},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
 
 
 @extend_schema(
@@ -131,16 +386,183 @@ def cancel_booking(request):
 
 
 @extend_schema(
-    responses={200: BookingSerializer(many=True)},
-    description="Get list of bookings for the authenticated user.",
+    request=BookingSeriesSerializer,
+    responses={
+        201: BookingSeriesSerializer,
+        400: OpenApiResponse(description="Invalid series or conflicting dates."),
+    },
+    description=(
+        "Book the same seat and time on a daily or weekly schedule. Either every "
+        "occurrence is booked or none is."
+    ),
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_booking_series(request):
+    user = request.user
+    serializer = BookingSeriesSerializer(data=request.data)
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    series = BookingSeries(user=user, **serializer.validated_data)
+    seat_id = series.seat.pk
+    occurrences = list(series.occurrences())
+
+    try:
+        with transaction.atomic():
+            Booking.objects.lock_seats([seat_id])
+            booked = merge_intervals(
+                (start_time, end_time)
+                for _, start_time, end_time in Booking.objects.conflicting_intervals(
+                    [
+                        (seat_id, start_time, end_time)
+                        for start_time, end_time in occurrences
+                    ]
+                )
+            )
+            conflicts = [
+                {"start_time": start_time, "end_time": end_time}
+                for start_time, end_time in occurrences
+                if overlaps(booked, start_time, end_time)
+            ]
+            if conflicts:
+                return Response(
+                    {"error": SEAT_ALREADY_BOOKED, "conflicts": conflicts},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            series.save()
+            bookings = Booking.objects.bulk_create(
+                Booking(
+                    user=user,
+                    seat=series.seat,
+                    series=series,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+                for start_time, end_time in occurrences
+            )
+            availability_cache.invalidate_bookings(bookings)
+    except IntegrityError:
+        return Response(
+            {"error": SEAT_ALREADY_BOOKED}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    response_data = BookingSeriesSerializer(series).data
+    response_data["bookings"] = len(bookings)
+    return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(
+    request=None,
+    parameters=[
+        OpenApiParameter(
+            name="series_id",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description="ID of the booking series to cancel",
+        )
+    ],
+    responses={
+        200: OpenApiResponse(description="Booking series cancelled successfully."),
+        404: OpenApiResponse(description="Booking series not found."),
+    },
+    methods=["POST"],
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def cancel_booking_series(request):
+    user = request.user
+    series_id = request.data.get("series_id")
+    series = get_object_or_404(BookingSeries, id=series_id, user=user)
+    series.cancel()
+    return Response({"message": "Booking series cancelled successfully."})
+
+
+def _paginate_bookings(request, paginator, bookings):
+    expand = parse_expand(request.query_params.get("expand"))
+    if not expand:
+        rows = row_mapper(BookingSerializer)
+        page = paginator.paginate_queryset(rows.values(bookings), request)
+        return paginator.get_paginated_response(rows(page))
+
+    bookings = BookingSerializer.select_expanded(bookings, expand)
+    page = paginator.paginate_queryset(bookings, request)
+    serializer = BookingSerializer(page, many=True, expand=expand)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="from",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Only bookings starting at or after this ISO 8601 time",
+        ),
+        OpenApiParameter(
+            name="to",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Only bookings starting before this ISO 8601 time",
+        ),
+        OpenApiParameter(
+            name="status",
+            type=str,
+            enum=["upcoming", "past"],
+            location=OpenApiParameter.QUERY,
+            description="Upcoming bookings end in the future, past ones have ended",
+        ),
+        OpenApiParameter(
+            name="summary",
+            type=bool,
+            location=OpenApiParameter.QUERY,
+            description="Return booking counts per status instead of the list",
+        ),
+        OpenApiParameter(
+            name="expand",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Nest related objects instead of IDs, e.g. seat.room.office",
+        ),
+    ],
+    responses={
+        200: BookingSerializer(many=True),
+        400: OpenApiResponse(description="Bad request."),
+    },
+    description=(
+        "Get list of bookings for the authenticated user. Upcoming bookings are "
+        "listed soonest first, past bookings most recent first."
+    ),
 )
 @api_view(["GET"])
+@authentication_classes([SnapshotJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@read_only
 def list_my_bookings(request):
-    user = request.user
-    bookings = Booking.objects.filter(user=user, is_active=True)
-    serializer = BookingSerializer(bookings, many=True)
-    return Response(serializer.data)
+    serializer = MyBookingsSerializer(data=request.query_params)
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    if params["summary"]:
+        bookings = Booking.objects.for_user(
+            request.user, start=params.get("from"), end=params.get("to")
+        )
+        return Response(Booking.objects.status_summary(bookings))
+
+    bookings = Booking.objects.for_user(
+        request.user,
+        start=params.get("from"),
+        end=params.get("to"),
+        status=params.get("status"),
+    )
+    paginator = BookingPagination()
+    if params.get("status") == MyBookingsSerializer.PAST:
+        paginator.ordering = ("-start_time", "-id")
+    return _paginate_bookings(request, paginator, bookings)
 
 
 @extend_schema(
@@ -148,14 +570,16 @@ def list_my_bookings(request):
         OpenApiParameter(
             name="user_id",
             type=int,
+            many=True,
             location=OpenApiParameter.QUERY,
-            description="ID of the user",
+            description="ID of the user, repeat for several users",
         ),
         OpenApiParameter(
             name="seat_id",
             type=int,
+            many=True,
             location=OpenApiParameter.QUERY,
-            description="ID of the seat",
+            description="ID of the seat, repeat for several seats",
         ),
         OpenApiParameter(
             name="date",
@@ -163,6 +587,18 @@ def list_my_bookings(request):
             location=OpenApiParameter.QUERY,
             description="Date in YYYY-MM-DD format",
         ),
+        OpenApiParameter(
+            name="end_date",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Last date of the range in YYYY-MM-DD format",
+        ),
+        OpenApiParameter(
+            name="expand",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Nest related objects instead of IDs, e.g. seat.room.office",
+        ),
     ],
     responses={
         200: BookingSerializer(many=True),
@@ -171,18 +607,21 @@ def list_my_bookings(request):
     description="Get booking history for the authenticated user.",
 )
 @api_view(["GET"])
+@authentication_classes([SnapshotJWTAuthentication])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@read_only
 def booking_history(request):
-    data = request.query_params
-
-    serializer = BookingHistorySerializer(data=data)
+    serializer = BookingHistorySerializer(data=request.query_params)
 
     if serializer.is_valid():
+        params = serializer.validated_data
         bookings = Booking.objects.booking_history(
-            seat_id=data["seat_id"], date=data["date"], user=data["user_id"]
+            seat_ids=params["seat_id"],
+            users=params["user_id"],
+            start_date=params["date"],
+            end_date=params.get("end_date"),
         )
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return _paginate_bookings(request, BookingPagination(), bookings)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -219,7 +658,9 @@ def booking_history(request):
     ],
 )
 @api_view(["GET"])
+@authentication_classes([SnapshotJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@read_only
 def available_seats(request):
     serializer = AvailableSeatsSerializer(data=request.query_params)
 
@@ -228,7 +669,7 @@ def available_seats(request):
 
     date = serializer.validated_data["date"]
     room_id = serializer.validated_data["room_id"]
-    available_times_by_seat = Seat.get_available_seats(date, room_id)
+    available_times_by_seat = availability_cache.get_available_seats(date, room_id)
 
     response_data = {
         "date": date,
@@ -236,3 +677,109 @@ def available_seats(request):
     }
 
     return Response(response_data, status=status.HTTP_200_OK)
+
+
+def _stream_available_seats(days):
+    yield "["
+    for index, (date, available_times_by_seat) in enumerate(days):
+        if index:
+            yield ","
+        yield json.dumps(
+            {"date": date.isoformat(), "time_by_seat": available_times_by_seat},
+            separators=(",", ":"),
+        )
+    yield "]"
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="room_id",
+            type={"type": "array", "items": {"type": "integer"}},
+            location=OpenApiParameter.QUERY,
+            description="ID of a room, may be repeated",
+        ),
+        OpenApiParameter(
+            name="start_date",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="First date in YYYY-MM-DD format",
+        ),
+        OpenApiParameter(
+            name="end_date",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Last date in YYYY-MM-DD format",
+        ),
+    ],
+    responses={
+        200: AvailableSeatsResponseSerializer(many=True),
+    },
+    description="Stream free slots per seat for every day of a date range.",
+)
+@api_view(["GET"])
+@authentication_classes([SnapshotJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@read_only
+def available_seats_range(request):
+    serializer = AvailableSeatsRangeSerializer(data=request.query_params)
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    days = keep_replica(
+        Seat.iter_available_seats(
+            serializer.validated_data["start_date"],
+            serializer.validated_data["end_date"],
+            serializer.validated_data["room_id"],
+        )
+    )
+    return StreamingHttpResponse(
+        _stream_available_seats(days), content_type="application/json"
+    )
+
+
+@extend_schema(
+    parameters=[OccupancySerializer],
+    responses={
+        200: OpenApiResponse(description="Utilization per seat, room and hour.")
+    },
+    description="Share of working-hour slots booked in an office or room over a date range.",
+)
+@api_view(["GET"])
+@authentication_classes([SnapshotJWTAuthentication])
+@permission_classes([IsAdminUser])
+@read_only
+def occupancy_report(request):
+    serializer = OccupancySerializer(data=request.query_params)
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    if "office_id" in data:
+        report = occupancy.office_occupancy(
+            data["start_date"], data["end_date"], data["office_id"]
+        )
+    else:
+        report = occupancy.room_occupancy(
+            data["start_date"], data["end_date"], data["room_id"]
+        )
+
+    response_data = {
+        "start_date": data["start_date"],
+        "end_date": data["end_date"],
+        **report,
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    responses={200: OpenApiResponse(description="Availability cache counters.")},
+    description="Hit and miss counters of the availability cache in this process.",
+)
+@api_view(["GET"])
+@authentication_classes([SnapshotJWTAuthentication])
+@permission_classes([IsAdminUser])
+def available_seats_cache_stats(request):
+    return Response(availability_cache.get_stats(), status=status.HTTP_200_OK)
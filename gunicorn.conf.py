@@ -0,0 +1,28 @@
+import multiprocessing
+import os
+
+# Production entry point: `gunicorn` in the project root picks this file up.
+# SERVER_MODE=wsgi runs threaded sync workers, SERVER_MODE=asgi runs uvicorn
+# workers for the /api/async/ endpoints.
+server_mode = os.getenv("SERVER_MODE", "wsgi")
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+if server_mode == "asgi":
+    wsgi_app = "order_proj.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    # One event loop per core; the loop does the multiplexing.
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count))
+else:
+    wsgi_app = "order_proj.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks cannot build up.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
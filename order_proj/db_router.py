@@ -0,0 +1,132 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Replica alias that reads in the current request may use; None means primary.
+_replica = ContextVar("replica", default=None)
+
+
+def _sticky_key(user_id):
+    return f"replica-sticky:{user_id}"
+
+
+def _is_user(user):
+    return getattr(user, "is_authenticated", False)
+
+
+def _pick(sticky):
+    if sticky or not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def choose_replica(user):
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return _pick(_is_user(user) and cache.get(_sticky_key(user.pk)))
+
+
+async def achoose_replica(user):
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return _pick(_is_user(user) and await cache.aget(_sticky_key(user.pk)))
+
+
+def mark_write(user):
+    if settings.DATABASE_REPLICAS and _is_user(user):
+        cache.set(_sticky_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+@contextmanager
+def use_replica(alias):
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def replica_reads(user):
+    return use_replica(choose_replica(user))
+
+
+def primary():
+    return use_replica(None)
+
+
+def keep_replica(iterable):
+    # Streamed responses are consumed after the view has returned; run each
+    # step under the alias that was chosen for the view.
+    return _iterate_on(_replica.get(), iter(iterable))
+
+
+def _iterate_on(alias, iterator):
+    while True:
+        with use_replica(alias):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def read_only(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request.user):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        # Reads inside a transaction on the primary must see its writes.
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    # After a successful write, send the user's reads to the primary for
+    # REPLICA_STICKY_SECONDS so they do not miss it on a lagging replica.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            mark_write(getattr(request, "user", None))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            # The user may still be a lazy session lookup.
+            await sync_to_async(mark_write)(getattr(request, "user", None))
+        return response
+
+    def is_write(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
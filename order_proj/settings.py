@@ -35,18 +35,20 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "order_proj.db_router.ReplicaStickinessMiddleware",
 ]
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": ("booking.renderers.ORJSONRenderer",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 ROOT_URLCONF = "order_proj.urls"
@@ -80,8 +82,59 @@ DATABASES = {
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
+        # Keep connections open between requests and check them before reuse.
+        # ASGI opens a connection per request thread, so it defaults to 0 there.
+        # Behind PgBouncer in transaction mode set this to 0 as well.
+        "CONN_MAX_AGE": int(
+            os.getenv(
+                "DB_CONN_MAX_AGE", 0 if os.getenv("SERVER_MODE") == "asgi" else 60
+            )
+        ),
+        "CONN_HEALTH_CHECKS": True,
+        # Transaction pooling cannot keep server-side cursors across statements.
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_PGBOUNCER", "") == "1",
     }
 }
+# Read replicas: host[:port] per replica, or a file name for SQLite. Read-only
+# views use them; writes and transactions stay on the primary.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(","))):
+    alias = f"replica_{index}"
+    if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        location = {"NAME": replica.strip()}
+    else:
+        host, _, port = replica.strip().partition(":")
+        location = {"HOST": host, "PORT": port or DATABASES["default"]["PORT"]}
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        **location,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["order_proj.db_router.ReplicaRouter"]
+# Seconds a user's reads stay on the primary after they wrote something
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "booking",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 10000))},
+    }
+}
+if os.getenv("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
+AVAILABILITY_CACHE = "default"
+AVAILABILITY_CACHE_TIMEOUT = int(os.getenv("AVAILABILITY_CACHE_TIMEOUT", 300))
+OFFICE_CONFIG_TTL = int(os.getenv("OFFICE_CONFIG_TTL", 300))
+USER_SNAPSHOT_TTL = int(os.getenv("USER_SNAPSHOT_TTL", 30))
+USER_SNAPSHOT_MAX_ENTRIES = int(os.getenv("USER_SNAPSHOT_MAX_ENTRIES", 10000))
+# Saving a user bumps its snapshot version here, so every worker reloads it.
+USER_SNAPSHOT_CACHE = "default"
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -113,6 +166,11 @@ USE_TZ = True
 
 MIN_BOOKING_DURATION = float(os.getenv("MIN_BOOKING_DURATION", 60 * 60))
 MAX_BOOKING_DURATION = float(os.getenv("MAX_BOOKING_DURATION", 60 * 60 * 24 * 7))
+MAX_BATCH_BOOKINGS = int(os.getenv("MAX_BATCH_BOOKINGS", 500))
+MAX_AVAILABILITY_RANGE_DAYS = int(os.getenv("MAX_AVAILABILITY_RANGE_DAYS", 31))
+MAX_OCCUPANCY_RANGE_DAYS = int(os.getenv("MAX_OCCUPANCY_RANGE_DAYS", 366))
+MAX_SERIES_OCCURRENCES = int(os.getenv("MAX_SERIES_OCCURRENCES", 366))
+SOFT_DELETE_CHUNK_SIZE = int(os.getenv("SOFT_DELETE_CHUNK_SIZE", 0)) or None
 BOOKING_DURATION = int(os.getenv("BOOKING_DURATION"))
 END_OF_WORK_HOUR = int(os.getenv("END_OF_WORK_HOUR")) - 1
 START_OF_WORK_HOUR = int(os.getenv("START_OF_WORK_HOUR"))
@@ -124,6 +182,14 @@ END_OF_WORK_MINUTE = int(os.getenv("END_OF_WORK_MINUTE"))
 
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static/"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    },
+}
+# Fall back to unhashed names when collectstatic has not been run (tests, dev).
+WHITENOISE_MANIFEST_STRICT = False
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -136,4 +202,6 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_REFRESH_SERIALIZER": "authenticate.serializers.BlacklistingTokenRefreshSerializer",
 }
+TOKEN_BLACKLIST_CACHE = "default"